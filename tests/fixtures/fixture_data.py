@@ -45,3 +45,32 @@ def few_posts_with_group(mixer, user, group):
 def another_few_posts_with_group_with_follower(mixer, user, another_user, group):
     mixer.blend('posts.Follow', user=user, author=another_user)
     mixer.cycle(20).blend(Post, author=another_user, group=group)
+
+
+@pytest.fixture
+def seeded_data(mixer, user, another_user):
+    """Набор данных, на котором видны лишние запросы и сканирования."""
+    groups = mixer.cycle(3).blend(Group)
+    authors = mixer.cycle(5).blend('auth.User') + [another_user]
+    posts = mixer.cycle(60).blend(
+        Post,
+        author=mixer.sequence(*authors),
+        group=mixer.sequence(*groups, None),
+        image='',
+    )
+    for author in authors:
+        mixer.blend('posts.Follow', user=user, author=author)
+    mixer.cycle(30).blend(
+        'posts.Comment',
+        post=mixer.sequence(*posts[:5]),
+        author=mixer.sequence(*authors),
+    )
+    upload = mixer.blend(
+        'posts.UploadSession', user=user, file_name='image.png', size=100
+    )
+    return {
+        'group': groups[0],
+        'author': another_user,
+        'post': posts[0],
+        'upload': upload,
+    }
@@ -0,0 +1,187 @@
+import re
+from io import BytesIO
+
+import pytest
+from PIL import Image
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+from posts.models import UploadSession
+
+# Для каждого адреса из posts.urls, users.urls и about.urls:
+# аргументы для reverse(), нужна ли авторизация и допустимое число запросов.
+# Новый адрес без записи здесь уронит test_every_url_has_budget.
+URL_BUDGETS = {
+    'posts:index': ({}, False, 2),
+    'posts:index_fragment': ({}, False, 1),
+    'posts:trending': ({}, False, 2),
+    'posts:group_posts': ({'slug': 'group'}, False, 3),
+    'posts:group_posts_fragment': ({'slug': 'group'}, False, 2),
+    'posts:profile': ({'username': 'author'}, True, 6),
+    'posts:profile_fragment': ({'username': 'author'}, False, 2),
+    'posts:post_detail': ({'post_id': 'post'}, True, 4),
+    'posts:post_create': ({}, True, 3),
+    'posts:post_edit': ({'post_id': 'post'}, True, 4),
+    'posts:upload_create': ({}, True, 3),
+    'posts:upload_chunk': ({'upload_id': 'upload'}, True, 4),
+    'posts:upload_finalize': ({'upload_id': 'upload'}, True, 14),
+    'posts:add_comment': ({'post_id': 'post'}, True, 13),
+    'posts:comment_updates': ({'post_id': 'post'}, False, 2),
+    'posts:follow_updates': ({}, True, 4),
+    'posts:follow_index': ({}, True, 6),
+    'posts:follow_index_fragment': ({}, True, 3),
+    'posts:profile_follow': ({'username': 'author'}, True, 9),
+    'posts:profile_unfollow': ({'username': 'author'}, True, 8),
+    'users:logout': ({}, True, 4),
+    'users:signup': ({}, False, 0),
+    'users:login': ({}, False, 0),
+    'about:author': ({}, False, 0),
+    'about:tech': ({}, False, 0),
+}
+
+# Адреса, которые делают работу не на GET: как их вызвать и какой код
+# ответа подтверждает, что измерен рабочий путь, а не отказ. Остальные
+# адреса, включая подписку и выход, работают на GET.
+URL_REQUESTS = {
+    'posts:add_comment': ('post_comment', 302),
+    'posts:upload_create': ('post_upload', 201),
+    'posts:upload_chunk': ('put_chunk', 200),
+    'posts:upload_finalize': ('post_finalize', 201),
+}
+
+CHECKED_NAMESPACES = ('posts', 'users', 'about')
+
+# Полный проход по таблице постов без индекса. Старые версии SQLite
+# пишут `SCAN TABLE posts_post`, новые — `SCAN posts_post`.
+FULL_SCAN = re.compile(r'SCAN (?:TABLE )?posts_post(?! USING)')
+
+
+def url_names():
+    names = []
+    for pattern in get_resolver().url_patterns:
+        if not isinstance(pattern, URLResolver):
+            continue
+        if pattern.namespace not in CHECKED_NAMESPACES:
+            continue
+        for child in pattern.url_patterns:
+            if isinstance(child, URLPattern) and child.name:
+                names.append(f'{pattern.namespace}:{child.name}')
+    return names
+
+
+def build_url(name, kwargs, seeded_data):
+    values = {
+        'group': seeded_data['group'].slug,
+        'author': seeded_data['author'].username,
+        'post': seeded_data['post'].id,
+        'upload': seeded_data['upload'].id,
+    }
+    return reverse(
+        name, kwargs={key: values[value] for key, value in kwargs.items()}
+    )
+
+
+def png_bytes():
+    buffer = BytesIO()
+    Image.new('RGB', (2, 2)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class Requests:
+    """Готовит запрос к адресу и возвращает функцию, которая его делает.
+
+    Подготовка (например, загрузка всех частей перед finalize) идёт до
+    замера и в бюджет не попадает.
+    """
+
+    def __init__(self, client, url, seeded_data):
+        self.client = client
+        self.url = url
+        self.upload = seeded_data['upload']
+
+    def get(self):
+        return lambda: self.client.get(self.url)
+
+    def post_comment(self):
+        return lambda: self.client.post(self.url, {'text': 'Комментарий'})
+
+    def post_upload(self):
+        data = {'name': 'image.png', 'size': len(png_bytes())}
+        return lambda: self.client.post(self.url, data)
+
+    def put_chunk(self):
+        data = png_bytes()
+        UploadSession.objects.filter(pk=self.upload.pk).update(
+            size=len(data)
+        )
+        return lambda: self.client.put(
+            self.url, data, content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes 0-{len(data) - 1}/{len(data)}'
+        )
+
+    def post_finalize(self):
+        put = Requests(
+            self.client,
+            reverse('posts:upload_chunk', args=(self.upload.id,)),
+            {'upload': self.upload}
+        ).put_chunk()
+        assert put().status_code == 200
+        return lambda: self.client.post(self.url, {'text': 'Пост'})
+
+
+def query_plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+class TestQueryPlans:
+
+    def test_every_url_has_budget(self):
+        missing = set(url_names()) - set(URL_BUDGETS)
+        assert not missing, (
+            f'Добавьте адреса {sorted(missing)} в `URL_BUDGETS`, '
+            'чтобы для них проверялись запросы к базе'
+        )
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('name', sorted(URL_BUDGETS))
+    def test_view_queries(self, name, seeded_data, request, settings,
+                          tmp_path):
+        kwargs, needs_login, budget = URL_BUDGETS[name]
+        method, status = URL_REQUESTS.get(name, ('get', None))
+        settings.MEDIA_ROOT = str(tmp_path / 'media')
+        settings.UPLOAD_SESSIONS_ROOT = str(tmp_path / 'uploads')
+        url = build_url(name, kwargs, seeded_data)
+        # user_client авторизует тот же объект client, поэтому берём
+        # только одну из фикстур.
+        client = request.getfixturevalue(
+            'user_client' if needs_login else 'client'
+        )
+        send = getattr(Requests(client, url, seeded_data), method)()
+        # Заодно сбрасываются просмотры, накопленные другими тестами:
+        # их отложенная запись не должна попасть в бюджет.
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = send()
+        if status is not None:
+            assert response.status_code == status, (
+                f'`{url}` ответил {response.status_code}: '
+                f'{response.content[:200]!r}'
+            )
+
+        statements = [query['sql'] for query in context.captured_queries]
+        assert len(statements) <= budget, (
+            f'Страница `{url}` делает {len(statements)} запросов '
+            f'при бюджете {budget}:\n' + '\n'.join(statements)
+        )
+        for sql in statements:
+            if not sql.startswith('SELECT'):
+                continue
+            for step in query_plan(sql):
+                assert not FULL_SCAN.search(step), (
+                    f'Запрос страницы `{url}` читает всю таблицу постов '
+                    f'без индекса ({step}):\n{sql}'
+                )
@@ -1,5 +1,14 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        if settings.TEMPLATES_PRECOMPILE:
+            from .templates import precompile_templates
+
+            precompile_templates()
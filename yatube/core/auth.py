@@ -0,0 +1,30 @@
+"""Пользователь запроса из кеша.
+
+AuthenticationMiddleware на каждый запрос загружает пользователя сессии
+через бэкенд аутентификации. CachedModelBackend берёт его из кеша и
+ходит в базу только при промахе; любое сохранение или удаление User
+сбрасывает запись (см. core.signals).
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+
+def cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def forget(user_id):
+    cache.delete(cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        key = cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+        return user
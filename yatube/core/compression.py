@@ -0,0 +1,184 @@
+"""Сжатие ответов приложения: brotli, если он установлен, иначе gzip.
+
+В отличие от django.middleware.gzip.GZipMiddleware:
+
+* кодировка выбирается по Accept-Encoding с учётом q=0, brotli важнее;
+* StreamingHttpResponse сжимается по частям, и каждая часть сразу
+  уходит клиенту (Z_SYNC_FLUSH), ответ целиком в памяти не собирается;
+* сжимаются только текстовые типы из COMPRESSIBLE_TYPES. Картинки,
+  FileResponse и ответы, у которых уже есть Content-Encoding (копии .br
+  и .gz из core.static), отдаются как есть;
+* сжатые байты общих страниц кешируются по хешу содержимого, и одна и
+  та же страница из кеша фрагментов не пережимается на каждом запросе.
+  Общей считается страница без Cache-Control: private и CSRF-токена,
+  отданная анонимному посетителю без cookie сессии или не зависящая от
+  cookie вовсе. SessionMiddleware ставит Vary: Cookie на любой ответ, в
+  котором шаблон заглянул в request.user, поэтому одного Vary мало.
+
+brotli — необязательная зависимость: без пакета ответы сжимаются gzip.
+
+CSRF-токен в формах Django маскирует заново для каждого ответа, поэтому
+сжатие страниц с ним не открывает атаку BREACH.
+"""
+import hashlib
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import FileResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from .static import accepted_encodings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+)
+# Короткие ответы сжатие только удлиняет.
+MIN_SIZE = 200
+CACHE_PREFIX = 'compressed'
+
+
+def choose_encoding(request):
+    accepted = accepted_encodings(request)
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def compressor(encoding):
+    """Объект с методами compress(data) и flush() для кодировки."""
+    if encoding == 'br':
+        return BrotliCompressor()
+    return GzipCompressor()
+
+
+class GzipCompressor:
+    def __init__(self):
+        # wbits 16 + 15: заголовок и контрольная сумма gzip, окно 32 КБ.
+        self._compressor = zlib.compressobj(
+            settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+        )
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def sync(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def flush(self):
+        return self._compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self):
+        self._compressor = brotli.Compressor(
+            quality=settings.COMPRESSION_BROTLI_QUALITY
+        )
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def sync(self):
+        return self._compressor.flush()
+
+    def flush(self):
+        return self._compressor.finish()
+
+
+def compress_bytes(data, encoding):
+    stream = compressor(encoding)
+    return stream.compress(data) + stream.flush()
+
+
+def compress_stream(chunks, encoding):
+    """Сжимает части по одной; каждая часть уходит клиенту сразу."""
+    stream = compressor(encoding)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode(settings.DEFAULT_CHARSET)
+        data = stream.compress(chunk) + stream.sync()
+        if data:
+            yield data
+    yield stream.flush()
+
+
+def is_compressible(response):
+    if response.status_code != 200 or isinstance(response, FileResponse):
+        return False
+    if response.has_header('Content-Encoding'):
+        return False
+    content_type = response.get('Content-Type', '').lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def is_shared(request, response):
+    """Одинаковые байты получают все: ответ стоит кешировать сжатым."""
+    cache_control = response.get('Cache-Control', '').lower()
+    if 'private' in cache_control or 'no-store' in cache_control:
+        return False
+    # Токен в форме маскируется заново для каждого ответа.
+    if request.META.get('CSRF_COOKIE_USED'):
+        return False
+    if 'cookie' not in response.get('Vary', '').lower():
+        return True
+    session = getattr(request, 'session', None)
+    return (
+        session is not None
+        and not session.modified
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+    )
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    def process_response(self, request, response):
+        if not is_compressible(response):
+            return response
+        if not response.streaming and len(response.content) < MIN_SIZE:
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, encoding
+            )
+            del response['Content-Length']
+        else:
+            compressed = self.compress_content(request, response, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # Сильный ETag описывает несжатые байты: RFC 7232, раздел 2.1.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    def compress_content(self, request, response, encoding):
+        content = response.content
+        if not is_shared(request, response):
+            return compress_bytes(content, encoding)
+        digest = hashlib.md5(content).hexdigest()
+        key = f'{CACHE_PREFIX}:{encoding}:{digest}'
+        compressed = cache.get(key)
+        if compressed is None:
+            compressed = compress_bytes(content, encoding)
+            cache.set(key, compressed, settings.COMPRESSION_CACHE_TIMEOUT)
+        return compressed
@@ -0,0 +1,82 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# То же, что делает воркер при старте: настройки, django.setup()
+# с ready() всех приложений и загрузка URLconf.
+BOOT = (
+    'from django.core.wsgi import get_wsgi_application;'
+    'from django.urls import get_resolver;'
+    'get_wsgi_application();'
+    'get_resolver().url_patterns'
+)
+
+
+def parse_importtime(output):
+    """Разбирает вывод -X importtime в [(модуль, cumulative мкс)].
+
+    Берутся только модули верхнего уровня, импортированные напрямую:
+    их cumulative уже включает всё, что они импортировали сами.
+    """
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not cumulative.strip().isdigit() or name.startswith('   '):
+            continue
+        imports.append((name.strip(), int(cumulative)))
+    return imports
+
+
+def boot(settings_module):
+    """Запускает воркер в новом процессе и возвращает (секунды, импорты)."""
+    environment = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module)
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', BOOT],
+        cwd=settings.BASE_DIR, env=environment,
+        stderr=subprocess.PIPE, universal_newlines=True, check=True,
+    )
+    return time.perf_counter() - started, parse_importtime(result.stderr)
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время старта воркера с разными модулями настроек и '
+        'показывает самые дорогие импорты (python -X importtime).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'settings_modules', nargs='*',
+            default=['yatube.settings.dev', 'yatube.settings.prod'],
+            help='Модули настроек для сравнения.',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Сколько раз запустить воркер с каждыми настройками.',
+        )
+        parser.add_argument(
+            '--top', type=int, default=10,
+            help='Сколько самых дорогих импортов показать.',
+        )
+
+    def handle(self, *args, **options):
+        for module in options['settings_modules']:
+            runs = [boot(module) for _ in range(options['repeat'])]
+            wall = statistics.median(elapsed for elapsed, _ in runs)
+            imports = runs[-1][1]
+            total = sum(cumulative for _, cumulative in imports)
+            self.stdout.write(
+                f'{module}: старт {wall * 1000:.0f} мс, '
+                f'из них импорты {total / 1000:.0f} мс'
+            )
+            slowest = sorted(imports, key=lambda item: -item[1])
+            for name, cumulative in slowest[:options['top']]:
+                self.stdout.write(f'  {cumulative / 1000:8.1f} мс  {name}')
@@ -0,0 +1,82 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory
+
+from posts.models import Post
+
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def make_backend():
+    """Движок как в продакшене: с кешируемым загрузчиком."""
+    params = dict(settings.TEMPLATES[0])
+    del params['BACKEND']
+    params.update(NAME='bench', APP_DIRS=False)
+    params['OPTIONS'] = dict(
+        params['OPTIONS'],
+        loaders=[('django.template.loaders.cached.Loader', LOADERS)],
+    )
+    return DjangoTemplates(params)
+
+
+def timed_render(backend, name, context, request):
+    started = time.perf_counter()
+    backend.get_template(name).render(context, request)
+    return time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время рендера шаблона в свежем процессе (с разбором) '
+        'и после прогрева кеша шаблонов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'templates', nargs='*',
+            default=['posts/index.html', 'posts/group_list.html'],
+            help='Шаблоны страниц со списком постов.',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=50,
+            help='Сколько раз отрендерить каждый шаблон.',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.select_related('author', 'group')
+        page_obj = Paginator(posts, settings.POSTS_PAGINATE).get_page(1)
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        context = {
+            'page_obj': page_obj,
+            'group': page_obj[0].group if page_obj else None,
+        }
+        warm_backend = make_backend()
+        for name in options['templates']:
+            # Холодный рендер: новый движок, как в только что
+            # запущенном воркере, разбирает шаблон и все включения.
+            cold = [
+                timed_render(make_backend(), name, context, request)
+                for _ in range(options['repeat'])
+            ]
+            timed_render(warm_backend, name, context, request)
+            warm = [
+                timed_render(warm_backend, name, context, request)
+                for _ in range(options['repeat'])
+            ]
+            cold_ms = statistics.median(cold) * 1000
+            warm_ms = statistics.median(warm) * 1000
+            self.stdout.write(
+                f'{name}: холодный {cold_ms:.2f} мс, '
+                f'прогретый {warm_ms:.2f} мс, '
+                f'быстрее в {cold_ms / warm_ms:.1f} раза'
+            )
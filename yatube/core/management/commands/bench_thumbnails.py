@@ -0,0 +1,85 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.test import RequestFactory
+from django.utils.module_loading import import_string
+from sorl.thumbnail import default
+
+from posts.models import Post
+
+from .bench_templates import make_backend
+
+STORES = [
+    'sorl.thumbnail.kvstores.cached_db_kvstore.KVStore',
+    'core.thumbnails.KVStore',
+]
+# Лента без кеша фрагментов: каждый рендер обращается к хранилищу.
+FEED = (
+    '{% load thumbnail_prefetch %}'
+    '{% prefetch_thumbnails page_obj "image" "960x339" crop="center" '
+    'upscale=True %}'
+    '{% for post in page_obj %}'
+    '{% include "includes/post_card.html" %}'
+    '{% endfor %}'
+)
+
+
+def timed_render(template, context, request):
+    started = time.perf_counter()
+    template.render(context, request)
+    return time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время рендера ленты с картинками со стандартным '
+        'хранилищем метаданных sorl-thumbnail и с core.thumbnails.KVStore.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat', type=int, default=50,
+            help='Сколько раз отрендерить ленту с каждым хранилищем.',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').select_related(
+            'author', 'group'
+        )
+        page_obj = Paginator(posts, settings.POSTS_PAGINATE).get_page(1)
+        if not page_obj:
+            self.stderr.write('Нет постов с картинками.')
+            return
+        template = make_backend().from_string(FEED)
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        context = {'page_obj': page_obj}
+        original = default.kvstore._wrapped
+        try:
+            for path in STORES:
+                store_class = import_string(path)
+                # Первый рендер создаёт недостающие миниатюры и записи.
+                default.kvstore._wrapped = store_class()
+                timed_render(template, context, request)
+                cold = []
+                for _ in range(options['repeat']):
+                    # Как в только что запущенном воркере: кеш процесса
+                    # пуст, записи лежат только в постоянном хранилище.
+                    cache.clear()
+                    default.kvstore._wrapped = store_class()
+                    cold.append(timed_render(template, context, request))
+                warm = [
+                    timed_render(template, context, request)
+                    for _ in range(options['repeat'])
+                ]
+                self.stdout.write(
+                    f'{path}: холодный {statistics.median(cold) * 1000:.2f}'
+                    f' мс, прогретый {statistics.median(warm) * 1000:.2f} мс'
+                )
+        finally:
+            default.kvstore._wrapped = original
@@ -0,0 +1,57 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+
+
+def timed_get(url):
+    started = time.perf_counter()
+    Client().get(url)
+    return time.perf_counter() - started
+
+
+def close_connection(_):
+    connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет пропускную способность страниц через WSGI-обработчик '
+        'при разном числе одновременных запросов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'urls', nargs='*', default=['/', '/about/author/'],
+            help='Адреса страниц для замера.',
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Сколько запросов отправить на каждый адрес.',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, nargs='+', default=[1, 4, 16],
+            help='Числа одновременных запросов, которые нужно сравнить.',
+        )
+
+    def handle(self, *args, **options):
+        for url in options['urls']:
+            for workers in options['concurrency']:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    started = time.perf_counter()
+                    latencies = sorted(pool.map(
+                        timed_get, [url] * options['requests']
+                    ))
+                    elapsed = time.perf_counter() - started
+                    # У каждого потока своё соединение с базой.
+                    list(pool.map(close_connection, range(workers)))
+                p95 = latencies[int(len(latencies) * 0.95) - 1]
+                self.stdout.write(
+                    f'{url} x{workers}: '
+                    f'{len(latencies) / elapsed:.1f} запросов/с, '
+                    f'медиана {statistics.median(latencies) * 1000:.1f} мс, '
+                    f'p95 {p95 * 1000:.1f} мс'
+                )
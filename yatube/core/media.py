@@ -0,0 +1,191 @@
+"""Раздача загруженных файлов из MEDIA_ROOT.
+
+django.views.static.serve читает файл целиком и не понимает Range, а
+отдельного файлового сервера перед приложением нет. Здесь файл отдаётся
+через FileResponse: WSGI-сервер с wsgi.file_wrapper (gunicorn) шлёт его
+через os.sendfile, остальные — блоками по BLOCK_SIZE. Поддерживаются
+Range, If-Range и If-None-Match. Если MEDIA_SENDFILE_HEADER задан, сами
+байты отдаёт веб-сервер по заголовку X-Accel-Redirect или X-Sendfile.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (FileResponse, Http404, HttpResponse,
+                         HttpResponseNotModified)
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags, quote_etag
+from django.views.decorators.http import require_safe
+from sorl.thumbnail.conf import settings as thumbnail_settings
+
+BLOCK_SIZE = 64 * 1024
+BYTES_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+# Миниатюры sorl-thumbnail лежат в THUMBNAIL_PREFIX/ab/cd/<md5>.<ext>, где
+# md5 — хеш исходника и параметров, поэтому файл под таким именем никогда
+# не меняется. Похожее имя вне THUMBNAIL_PREFIX ничего не гарантирует.
+THUMBNAIL_NAME = re.compile(r'[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{32}\.\w+')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+class RangeFile:
+    """Отдаёт из открытого файла не больше length байт начиная с start.
+
+    fileno() оставлен, чтобы wsgi.file_wrapper мог отправить диапазон
+    через os.sendfile: gunicorn начинает с текущей позиции файла и
+    отправляет Content-Length байт.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """Возвращает (start, end) включительно или None для всего файла.
+
+    Несколько диапазонов сразу не поддерживаются, и тогда, как разрешает
+    RFC 7233, отдаётся весь файл. Для недостижимого диапазона бросается
+    ValueError.
+    """
+    match = BYTES_RANGE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError
+    return start, end
+
+
+def etag_for(stat):
+    return quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+
+
+def is_thumbnail(name):
+    prefix = thumbnail_settings.THUMBNAIL_PREFIX
+    return name.startswith(prefix) and bool(
+        THUMBNAIL_NAME.fullmatch(name[len(prefix):])
+    )
+
+
+def guess_type(path):
+    return mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+
+def resolve(root, path):
+    """Полный путь к файлу внутри root или Http404."""
+    try:
+        full_path = safe_join(root, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    return full_path
+
+
+def cache_headers(response, stat, max_age=None):
+    """Заголовки кеширования; без max_age файл считается неизменным."""
+    response['ETag'] = etag_for(stat)
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if max_age is None:
+        response['Cache-Control'] = IMMUTABLE
+    else:
+        response['Cache-Control'] = f'public, max-age={max_age}'
+    return response
+
+
+def is_not_modified(request, etag):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if not if_none_match:
+        return False
+    etags = parse_etags(if_none_match)
+    return '*' in etags or etag in etags
+
+
+def requested_range(request, etag, size):
+    """Диапазон из Range, если If-Range не говорит, что файл сменился."""
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not range_header or (if_range and if_range != etag):
+        return None
+    return parse_range(range_header, size)
+
+
+def send(request, full_path, content_type, stat):
+    """Отдаёт файл целиком или запрошенный диапазон, либо 416."""
+    try:
+        byte_range = requested_range(request, etag_for(stat), stat.st_size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+        response['Content-Length'] = stat.st_size
+    elif byte_range is None:
+        response = FileResponse(
+            open(full_path, 'rb'), content_type=content_type
+        )
+        response['Content-Length'] = stat.st_size
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(
+            RangeFile(open(full_path, 'rb'), start, length),
+            content_type=content_type,
+            status=206,
+        )
+        response['Content-Length'] = length
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    response.block_size = BLOCK_SIZE
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+@require_safe
+def serve(request, path):
+    full_path = resolve(settings.MEDIA_ROOT, path)
+    name = posixpath.normpath(path).lstrip('/')
+    stat = os.stat(full_path)
+    content_type = guess_type(full_path)
+    max_age = None if is_thumbnail(name) else settings.MEDIA_CACHE_MAX_AGE
+    if is_not_modified(request, etag_for(stat)):
+        return cache_headers(HttpResponseNotModified(), stat, max_age)
+
+    header = settings.MEDIA_SENDFILE_HEADER
+    if header:
+        response = HttpResponse(content_type=content_type)
+        if header == 'X-Accel-Redirect':
+            # nginx раскодирует URI из заголовка: пробелы, кириллица,
+            # «?» и «%» в имени файла иначе ломают путь.
+            response[header] = quote(settings.MEDIA_ACCEL_PREFIX + name)
+        else:
+            response[header] = full_path
+        return cache_headers(response, stat, max_age)
+
+    response = send(request, full_path, content_type, stat)
+    if response.status_code == 416:
+        return response
+    return cache_headers(response, stat, max_age)
@@ -0,0 +1,62 @@
+"""Сессии в кеше с редкой записью в базу.
+
+SESSION_ENGINE = 'core.sessions'. Как и cached_db, сессия читается из
+кеша, и django_session нужна только при промахе. Но изменения сессии
+пишутся в базу не чаще раза в SESSION_PERSIST_INTERVAL секунд, остальные
+сохранения попадают только в кеш. Создание сессии, вход, выход и смена
+пароля доходят до базы сразу.
+
+Кеш должен быть общим для всех воркеров, как и для счётчиков лент. Если
+кеш потерял сессию, она читается из базы и может откатиться не больше
+чем на SESSION_PERSIST_INTERVAL.
+"""
+from django.conf import settings
+from django.contrib.auth import HASH_SESSION_KEY
+from django.contrib.sessions.backends.cached_db import \
+    SessionStore as CachedDBStore
+from django.utils import timezone
+
+KEY_PREFIX = 'core.sessions'
+
+
+class SessionStore(CachedDBStore):
+    cache_key_prefix = KEY_PREFIX
+
+    def persisted_key(self, session_key):
+        return f'{self.cache_key_prefix}{session_key}:persisted'
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        interval = settings.SESSION_PERSIST_INTERVAL
+        # Вход, выход и смена пароля меняют хеш — такое пишется сразу.
+        marker = [self._get_session().get(HASH_SESSION_KEY)]
+        key = self.persisted_key(self.session_key)
+        if not must_create and interval and self._cache.get(key) == marker:
+            self._cache.set(
+                self.cache_key, self._session, self.get_expiry_age()
+            )
+            return
+        super().save(must_create)
+        if interval:
+            self._cache.set(key, marker, interval)
+
+    def delete(self, session_key=None):
+        session_key = session_key or self.session_key
+        super().delete(session_key)
+        if session_key is not None:
+            self._cache.delete(self.persisted_key(session_key))
+
+    @classmethod
+    def clear_expired(cls):
+        """Удаляет истёкшие сессии пачками, не блокируя базу надолго."""
+        sessions = cls.get_model_class().objects
+        while True:
+            keys = list(
+                sessions.filter(expire_date__lt=timezone.now()).values_list(
+                    'session_key', flat=True
+                )[:settings.SESSION_CLEANUP_BATCH_SIZE]
+            )
+            if not keys:
+                return
+            sessions.filter(session_key__in=keys).delete()
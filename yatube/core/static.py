@@ -0,0 +1,67 @@
+"""Раздача собранной статики из STATIC_ROOT.
+
+Если клиент принимает brotli или gzip и collectstatic положил рядом с
+файлом сжатую копию (см. core.storage), отдаётся она с заголовком
+Content-Encoding — сжатие на лету не нужно.
+"""
+import os
+import re
+
+from django.conf import settings
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import require_safe
+
+from . import media
+
+# Имена, которые даёт ManifestStaticFilesStorage: style.0123456789ab.css.
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+# Сжатые копии в порядке предпочтения.
+VARIANTS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def accepted_encodings(request):
+    encodings = set()
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    for item in header.split(','):
+        encoding, _, params = item.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        encodings.add(encoding.strip().lower())
+    return encodings
+
+
+def choose_variant(request, full_path):
+    """Возвращает (кодировка или None, путь к файлу для отдачи)."""
+    accepted = accepted_encodings(request)
+    for encoding, suffix in VARIANTS:
+        if encoding in accepted and os.path.isfile(full_path + suffix):
+            return encoding, full_path + suffix
+    return None, full_path
+
+
+@require_safe
+def serve(request, path):
+    full_path = media.resolve(settings.STATIC_ROOT, path)
+    encoding, variant = choose_variant(request, full_path)
+    stat = os.stat(variant)
+    max_age = None if HASHED_NAME.search(path) else (
+        settings.STATIC_CACHE_MAX_AGE
+    )
+    if media.is_not_modified(request, media.etag_for(stat)):
+        response = HttpResponseNotModified()
+    else:
+        response = media.send(
+            request, variant, media.guess_type(full_path), stat
+        )
+        if response.status_code == 416:
+            return response
+        if encoding:
+            response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return media.cache_headers(response, stat, max_age)
@@ -0,0 +1,216 @@
+"""Сборка статики для продакшена.
+
+collectstatic с CompressedManifestStaticFilesStorage:
+
+* вычищает из CSS из STATIC_PURGE_CSS правила, классов которых нет в
+  шаблонах, — от Bootstrap остаётся малая часть;
+* даёт файлам имена с хешем содержимого, как ManifestStaticFilesStorage;
+* кладёт рядом с текстовыми файлами сжатые копии .gz и, если установлен
+  пакет brotli, .br. Их выбирает core.static.serve по Accept-Encoding.
+"""
+import gzip
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.template.utils import get_app_template_dirs
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.txt', '.json', '.html', '.ico')
+# Файлы меньше этого размера сжатие почти не уменьшает.
+COMPRESS_MIN_SIZE = 256
+# Содержимое группирующих правил разбирается и чистится рекурсивно,
+# остальные @-правила (@font-face, @keyframes) остаются как есть.
+GROUPING_RULES = ('@media', '@supports')
+CLASS = re.compile(r'\.(-?[_a-zA-Z][\w-]*)')
+# В :not() и [атрибутах] классы не обязаны встречаться в разметке.
+NOT_MATCHING = re.compile(r':not\([^)]*\)|\[[^\]]*\]')
+TOKEN = re.compile(r'[\w-]+')
+
+
+def _skip_string(css, pos):
+    quote = css[pos]
+    pos += 1
+    while css[pos] != quote:
+        pos += 2 if css[pos] == '\\' else 1
+    return pos + 1
+
+
+def _block_end(css, pos):
+    """Позиция сразу после '}', закрывающей '{' в позиции pos."""
+    depth = 0
+    while True:
+        char = css[pos]
+        if char in '"\'':
+            pos = _skip_string(css, pos)
+            continue
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return pos + 1
+        pos += 1
+
+
+def parse_css(css, pos=0):
+    """Разбирает CSS в список пар (заголовок, тело).
+
+    Тело — строка для обычных правил, список пар для @media и @supports
+    и None для инструкций вроде @charset и сохраняемых комментариев /*!.
+    Возвращает список и позицию, на которой закончился блок.
+    """
+    rules = []
+    start = pos
+    while pos < len(css):
+        char = css[pos]
+        if char in '"\'':
+            pos = _skip_string(css, pos)
+        elif css.startswith('/*', pos):
+            end = css.index('*/', pos + 2) + 2
+            if not css[start:pos].strip():
+                if css.startswith('/*!', pos):
+                    rules.append((css[pos:end], None))
+                start = end
+            pos = end
+        elif char == '{':
+            prelude = css[start:pos].strip()
+            if prelude.startswith(GROUPING_RULES):
+                children, pos = parse_css(css, pos + 1)
+                rules.append((prelude, children))
+            else:
+                end = _block_end(css, pos)
+                rules.append((prelude, css[pos + 1:end - 1]))
+                pos = end
+            start = pos
+        elif char == '}':
+            return rules, pos + 1
+        elif char == ';':
+            rules.append((css[start:pos + 1].strip(), None))
+            pos += 1
+            start = pos
+        else:
+            pos += 1
+    return rules, pos
+
+
+def render_css(rules):
+    parts = []
+    for prelude, body in rules:
+        if body is None:
+            parts.append(prelude)
+        elif isinstance(body, list):
+            inner = render_css(body)
+            if inner:
+                parts.append(f'{prelude}{{{inner}}}')
+        else:
+            parts.append(f'{prelude}{{{body}}}')
+    return ''.join(parts)
+
+
+def split_selectors(prelude):
+    """Делит список селекторов по запятым вне скобок."""
+    selectors, depth, start = [], 0, 0
+    for pos, char in enumerate(prelude):
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            selectors.append(prelude[start:pos])
+            start = pos + 1
+    selectors.append(prelude[start:])
+    return selectors
+
+
+def purge_rules(rules, used):
+    purged = []
+    for prelude, body in rules:
+        if isinstance(body, list):
+            purged.append((prelude, purge_rules(body, used)))
+        elif body is None or prelude.startswith('@'):
+            purged.append((prelude, body))
+        else:
+            selectors = [
+                selector for selector in split_selectors(prelude)
+                if set(CLASS.findall(NOT_MATCHING.sub('', selector))) <= used
+            ]
+            if selectors:
+                purged.append((','.join(selectors), body))
+    return purged
+
+
+def purge_css(css, used):
+    """Убирает из css селекторы с классами, которых нет в used."""
+    return render_css(purge_rules(parse_css(css)[0], used))
+
+
+def template_tokens():
+    """Все слова из шаблонов проекта — заведомо не меньше набора классов.
+
+    Классы, которые появляются только из скриптов, перечисляются в
+    STATIC_PURGE_SAFELIST.
+    """
+    directories = [
+        directory
+        for engine in settings.TEMPLATES
+        for directory in engine.get('DIRS', [])
+    ]
+    directories.extend(get_app_template_dirs('templates'))
+    tokens = set(settings.STATIC_PURGE_SAFELIST)
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for name in files:
+                with open(os.path.join(root, name), encoding='utf-8') as file:
+                    tokens.update(TOKEN.findall(file.read()))
+    return tokens
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            yield from super().post_process(paths, dry_run, **options)
+            return
+        paths = dict(paths)
+        purge = [name for name in settings.STATIC_PURGE_CSS if name in paths]
+        if purge:
+            used = template_tokens()
+        for name in purge:
+            storage, path = paths[name]
+            with storage.open(path) as source:
+                css = source.read().decode('utf-8')
+            # Хешироваться и сжиматься дальше будет уже очищенный файл.
+            self.delete(name)
+            self.save(name, ContentFile(purge_css(css, used).encode('utf-8')))
+            paths[name] = (self, name)
+        processed_names = set()
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if hashed_name and not isinstance(processed, Exception):
+                processed_names.update((name, hashed_name))
+            yield name, hashed_name, processed
+        for name in processed_names:
+            if name.endswith(COMPRESSIBLE):
+                self.compress(name)
+
+    def compress(self, name):
+        """Записывает рядом с файлом сжатые копии, если они меньше."""
+        path = self.path(name)
+        with open(path, 'rb') as file:
+            data = file.read()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return
+        variants = [('.gz', gzip.compress(data, 9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(data, quality=11)))
+        for suffix, compressed in variants:
+            if len(compressed) < len(data):
+                with open(path + suffix, 'wb') as file:
+                    file.write(compressed)
@@ -0,0 +1,44 @@
+"""Предварительная компиляция шаблонов проекта.
+
+С кешируемым загрузчиком шаблон разбирается при первом обращении, и
+первые запросы после деплоя или форка воркера платят за разбор всех
+шаблонов страницы. precompile_templates() заранее загружает в кеш
+каждый шаблон из DIRS, так что запросы сразу получают готовые деревья.
+"""
+import logging
+import os
+
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger(__name__)
+
+
+def template_names(directory):
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.relpath(os.path.join(root, name), directory)
+            yield path.replace(os.sep, '/')
+
+
+def precompile_templates():
+    """Загружает шаблоны в кеш загрузчиков и возвращает их число.
+
+    Без кешируемого загрузчика (DEBUG) смысла в этом нет, но и вреда тоже.
+    Ошибка в шаблоне не мешает запуску: она попадёт в лог и повторится
+    при запросе страницы.
+    """
+    count = 0
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        engine = backend.engine
+        for directory in engine.dirs:
+            for name in template_names(directory):
+                try:
+                    engine.get_template(name)
+                except (TemplateDoesNotExist, TemplateSyntaxError) as error:
+                    logger.warning('Шаблон %s не собран: %s', name, error)
+                else:
+                    count += 1
+    return count
@@ -0,0 +1,46 @@
+from django import template
+from sorl.thumbnail import default
+from sorl.thumbnail.parsers import parse_geometry
+
+from ..thumbnails import thumbnail_key
+
+register = template.Library()
+
+
+@register.simple_tag
+def prefetch_thumbnails(objects, field, geometry, **options):
+    """Одним запросом поднимает записи о миниатюрах для всей страницы.
+
+    {% prefetch_thumbnails page_obj "image" "960x339" crop="center" %}
+    перед циклом с {% thumbnail post.image "960x339" crop="center" %}:
+    geometry и параметры должны совпадать, иначе не совпадут ключи.
+    """
+    prefetch = getattr(default.kvstore, 'prefetch', None)
+    if prefetch is None:
+        return ''
+    files = (getattr(obj, field) for obj in objects)
+    prefetch([thumbnail_key(file_, geometry, options) for file_ in files
+              if file_])
+    return ''
+
+
+@register.simple_tag
+def thumbnail_size(width, height, geometry, crop=None, upscale=False,
+                   **options):
+    """Размеры миниатюры по известным размерам оригинала, без файлов.
+
+    {% thumbnail_size post.image_width post.image_height "960x339"
+    crop="center" upscale=True as size %} повторяет расчёт sorl-thumbnail
+    для тех же geometry, crop и upscale и даёт (ширина, высота) для
+    атрибутов <img>. Если размеры оригинала неизвестны, возвращает None.
+    """
+    if not width or not height:
+        return None
+    target_width, target_height = parse_geometry(geometry, width / height)
+    factors = (target_width / width, target_height / height)
+    factor = max(factors) if crop else min(factors)
+    if factor < 1 or upscale:
+        width, height = round(width * factor), round(height * factor)
+    if crop:
+        width, height = min(width, target_width), min(height, target_height)
+    return width, height
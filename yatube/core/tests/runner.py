@@ -0,0 +1,38 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+from django.utils.functional import empty
+from sorl.thumbnail import default
+
+
+@contextmanager
+def temporary_kvstore():
+    """Записи о миниатюрах на время тестов пишутся во временный каталог.
+
+    default.kvstore создаётся лениво и читает THUMBNAIL_KVSTORE_PATH один
+    раз, поэтому после подмены настройки он сбрасывается.
+    """
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'thumbnails.sqlite3')
+    try:
+        with override_settings(THUMBNAIL_KVSTORE_PATH=path):
+            default.kvstore._wrapped = empty
+            yield path
+    finally:
+        default.kvstore._wrapped = empty
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._kvstore = temporary_kvstore()
+        self._kvstore.__enter__()
+
+    def teardown_test_environment(self, **kwargs):
+        self._kvstore.__exit__(None, None, None)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,92 @@
+import gzip
+import hashlib
+import zlib
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from ..compression import CACHE_PREFIX, CompressionMiddleware
+
+User = get_user_model()
+
+PAGE = '<p>Пост о погоде.</p>' * 100
+
+
+def cache_key(content, encoding='gzip'):
+    return f'{CACHE_PREFIX}:{encoding}:{hashlib.md5(content).hexdigest()}'
+
+
+def compress(response, accept_encoding='gzip, deflate, br;q=0'):
+    request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+    return CompressionMiddleware(lambda request: response)(request)
+
+
+class CompressionMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_feed_page_is_gzipped(self):
+        """Лента уходит сжатой, если клиент принимает gzip."""
+        response = self.client.get(
+            reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn(
+            'Последние обновления на сайте',
+            gzip.decompress(response.content).decode(),
+        )
+
+    def test_refused_encoding_is_not_used(self):
+        response = compress(HttpResponse(PAGE), 'gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content.decode(), PAGE)
+
+    def test_images_are_left_as_is(self):
+        response = compress(HttpResponse(b'\x89PNG' * 100, 'image/png'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_stream_is_compressed_chunk_by_chunk(self):
+        """Каждая часть потока доходит до клиента, не дожидаясь конца."""
+        chunks = iter(['data: первое\n\n', 'data: второе\n\n'])
+        response = compress(
+            StreamingHttpResponse(chunks, content_type='text/plain')
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        first = decompressor.decompress(next(iter(response)))
+        self.assertEqual(first.decode(), 'data: первое\n\n')
+
+    def test_shared_page_is_compressed_once(self):
+        key = cache_key(PAGE.encode())
+        compress(HttpResponse(PAGE))
+        self.assertIsNotNone(cache.get(key))
+        cache.set(key, b'cached')
+        self.assertEqual(compress(HttpResponse(PAGE)).content, b'cached')
+
+    def test_private_page_is_not_cached(self):
+        response = HttpResponse(PAGE)
+        response['Vary'] = 'Cookie'
+        compress(response)
+        self.assertIsNone(cache.get(cache_key(PAGE.encode())))
+
+    def test_anonymous_feed_reuses_compressed_bytes(self):
+        """Vary: Cookie от пустой сессии не мешает кешировать ленту."""
+        response = self.client.get(
+            reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertIn('Cookie', response['Vary'])
+        page = gzip.decompress(response.content)
+        self.assertEqual(cache.get(cache_key(page)), response.content)
+
+    def test_logged_in_page_is_not_cached(self):
+        user = User.objects.create_user(username='reader')
+        self.client.force_login(user)
+        response = self.client.get(
+            reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        page = gzip.decompress(response.content)
+        self.assertIsNone(cache.get(cache_key(page)))
@@ -0,0 +1,130 @@
+import os
+import shutil
+import tempfile
+from urllib.parse import quote
+
+from django.conf import settings
+from django.test import Client, TestCase, override_settings
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+CONTENT = bytes(range(256)) * 4
+THUMBNAIL = 'cache/0a/1b/0123456789abcdef0123456789abcdef.jpg'
+HASHED_UPLOAD = 'posts/0123456789abcdef0123456789abcdef.jpg'
+ODD_NAME = 'posts/фото 100%?.gif'
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaServeTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for name in ('posts/picture.gif', THUMBNAIL, HASHED_UPLOAD, ODD_NAME):
+            path = os.path.join(TEMP_MEDIA_ROOT, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(CONTENT)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_whole_file(self):
+        response = self.client.get('/media/posts/picture.gif')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Content-Type'], 'image/gif')
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(
+            response['Cache-Control'],
+            f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}',
+        )
+
+    def test_ranges(self):
+        """Range отдаёт часть файла со статусом 206."""
+        cases = (
+            ('bytes=10-19', 10, 19),
+            ('bytes=1000-', 1000, len(CONTENT) - 1),
+            ('bytes=-24', len(CONTENT) - 24, len(CONTENT) - 1),
+            ('bytes=1000-5000', 1000, len(CONTENT) - 1),
+        )
+        for header, start, end in cases:
+            with self.subTest(header=header):
+                response = self.client.get(
+                    '/media/posts/picture.gif', HTTP_RANGE=header
+                )
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(
+                    b''.join(response.streaming_content),
+                    CONTENT[start:end + 1],
+                )
+                self.assertEqual(
+                    response['Content-Range'],
+                    f'bytes {start}-{end}/{len(CONTENT)}',
+                )
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(
+            '/media/posts/picture.gif', HTTP_RANGE='bytes=5000-'
+        )
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(CONTENT)}')
+
+    def test_stale_if_range_gets_whole_file(self):
+        response = self.client.get(
+            '/media/posts/picture.gif',
+            HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"old"',
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_none_match(self):
+        etag = self.client.get('/media/posts/picture.gif')['ETag']
+        response = self.client.get(
+            '/media/posts/picture.gif', HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_hashed_names_are_immutable(self):
+        response = self.client.get('/media/' + THUMBNAIL)
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_only_thumbnails_are_immutable(self):
+        """Загрузку с именем-хешем можно заменить: кеш на сутки."""
+        response = self.client.get('/media/' + HASHED_UPLOAD)
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    def test_missing_and_outside_files(self):
+        for url in ('/media/posts/missing.gif', '/media/../manage.py'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    @override_settings(MEDIA_SENDFILE_HEADER='X-Accel-Redirect')
+    def test_accel_redirect(self):
+        response = self.client.get('/media/posts/picture.gif')
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            settings.MEDIA_ACCEL_PREFIX + 'posts/picture.gif',
+        )
+        self.assertEqual(response.content, b'')
+
+    @override_settings(MEDIA_SENDFILE_HEADER='X-Accel-Redirect')
+    def test_accel_redirect_is_percent_encoded(self):
+        response = self.client.get('/media/' + quote(ODD_NAME))
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            settings.MEDIA_ACCEL_PREFIX
+            + 'posts/%D1%84%D0%BE%D1%82%D0%BE%20100%25%3F.gif',
+        )
+
+    @override_settings(MEDIA_SENDFILE_HEADER='X-Sendfile')
+    def test_sendfile(self):
+        response = self.client.get('/media/posts/picture.gif')
+        self.assertEqual(
+            response['X-Sendfile'],
+            os.path.join(TEMP_MEDIA_ROOT, 'posts', 'picture.gif'),
+        )
@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+from django.contrib.auth import SESSION_KEY, get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..auth import CachedModelBackend
+from ..sessions import SessionStore
+
+User = get_user_model()
+
+
+def stored_data(store):
+    session = Session.objects.get(session_key=store.session_key)
+    return session.get_decoded()
+
+
+class SessionStoreTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_changes_reach_database_periodically(self):
+        """Изменение сессии сначала живёт только в кеше."""
+        store = SessionStore()
+        store.create()
+        store['theme'] = 'dark'
+        store.save()
+        self.assertNotIn('theme', stored_data(store))
+        self.assertEqual(SessionStore(store.session_key)['theme'], 'dark')
+
+    @override_settings(SESSION_PERSIST_INTERVAL=0)
+    def test_interval_zero_writes_every_change(self):
+        store = SessionStore()
+        store.create()
+        store['theme'] = 'dark'
+        store.save()
+        self.assertEqual(stored_data(store)['theme'], 'dark')
+
+    def test_login_is_written_at_once(self):
+        user = User.objects.create_user(username='visitor')
+        client = Client()
+        client.force_login(user)
+        store = SessionStore(client.session.session_key)
+        self.assertEqual(stored_data(store)[SESSION_KEY], str(user.pk))
+
+    @override_settings(SESSION_CLEANUP_BATCH_SIZE=2)
+    def test_expired_sessions_are_removed_in_batches(self):
+        past = timezone.now() - timedelta(days=1)
+        for number in range(5):
+            Session.objects.create(
+                session_key=f'expired{number}', session_data='',
+                expire_date=past,
+            )
+        Session.objects.create(
+            session_key='alive', session_data='',
+            expire_date=timezone.now() + timedelta(days=1),
+        )
+        SessionStore.clear_expired()
+        self.assertQuerysetEqual(
+            Session.objects.values_list('session_key', flat=True),
+            ['alive'], transform=str,
+        )
+
+
+class CachedUserTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='regular')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_repeated_request_skips_session_and_user_queries(self):
+        """Сессия и пользователь второго запроса берутся из кеша."""
+        self.client.get(reverse('about:author'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('about:author'))
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_sessions_of_plain_model_backend_survive(self):
+        """Сессии, выданные до CachedModelBackend, остаются рабочими."""
+        client = Client()
+        client.force_login(
+            self.user, backend='django.contrib.auth.backends.ModelBackend'
+        )
+        response = client.get(reverse('about:author'))
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_saved_user_is_reloaded(self):
+        backend = CachedModelBackend()
+        backend.get_user(self.user.pk)
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Новое имя'
+        user.save()
+        reloaded = backend.get_user(self.user.pk)
+        self.assertEqual(reloaded.first_name, 'Новое имя')
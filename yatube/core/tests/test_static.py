@@ -0,0 +1,78 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+
+from ..storage import purge_css
+
+TEMP_STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class PurgeCssTest(TestCase):
+    def test_unused_selectors_are_removed(self):
+        css = (
+            '@charset "UTF-8";/*! license */.card{color:red}'
+            '.unused,.card-body{margin:0}.unused{padding:0}'
+            '@media (min-width:576px){.unused{top:0}.card{top:1px}}'
+            '@keyframes spin{to{transform:rotate(1turn)}}'
+            '.btn:not(.unused){content:"}"}'
+        )
+        self.assertEqual(
+            purge_css(css, {'card', 'card-body', 'btn'}),
+            '@charset "UTF-8";/*! license */.card{color:red}'
+            '.card-body{margin:0}'
+            '@media (min-width:576px){.card{top:1px}}'
+            '@keyframes spin{to{transform:rotate(1turn)}}'
+            '.btn:not(.unused){content:"}"}',
+        )
+
+
+@override_settings(
+    STATIC_ROOT=TEMP_STATIC_ROOT,
+    STATICFILES_STORAGE='core.storage.CompressedManifestStaticFilesStorage',
+)
+class CollectStaticTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(TEMP_STATIC_ROOT, 'staticfiles.json')) as f:
+            cls.manifest = json.load(f)['paths']
+        cls.css = cls.manifest['css/bootstrap.min.css']
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_STATIC_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_bootstrap_is_purged_hashed_and_compressed(self):
+        path = os.path.join(TEMP_STATIC_ROOT, self.css)
+        with open(path, encoding='utf-8') as file:
+            css = file.read()
+        self.assertIn('.card{', css)
+        self.assertNotIn('.carousel', css)
+        with gzip.open(path + '.gz', 'rt', encoding='utf-8') as file:
+            self.assertEqual(file.read(), css)
+
+    def test_compressed_variant_is_chosen_by_accept_encoding(self):
+        """Клиенту с gzip отдаётся заранее сжатая копия."""
+        url = settings.STATIC_URL + self.css
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertIn('immutable', response['Cache-Control'])
+        plain = self.client.get(url)
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)),
+            b''.join(plain.streaming_content),
+        )
@@ -0,0 +1,26 @@
+import copy
+
+from django.conf import settings
+from django.template import engines
+from django.test import TestCase, override_settings
+
+from ..templates import precompile_templates
+
+CACHED_TEMPLATES = copy.deepcopy(settings.TEMPLATES)
+CACHED_TEMPLATES[0]['APP_DIRS'] = False
+CACHED_TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+
+@override_settings(TEMPLATES=CACHED_TEMPLATES)
+class PrecompileTemplatesTest(TestCase):
+    def test_project_templates_are_cached(self):
+        """Все шаблоны проекта попадают в кеш загрузчика заранее."""
+        self.assertGreater(precompile_templates(), 0)
+        loader = engines['django'].engine.template_loaders[0]
+        self.assertIn('posts/index.html', loader.get_template_cache)
+        self.assertIn('includes/post_card.html', loader.get_template_cache)
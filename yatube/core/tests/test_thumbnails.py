@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from PIL import Image
+from sorl.thumbnail import default, get_thumbnail
+
+from posts.models import Post, User
+
+from ..templatetags.thumbnail_prefetch import thumbnail_size
+from ..thumbnails import KVStore, thumbnail_key
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+FEED = Template(
+    '{% load thumbnail thumbnail_prefetch %}'
+    '{% prefetch_thumbnails posts "image" "960x339" crop="center" '
+    'upscale=True %}'
+    '{% for post in posts %}'
+    '{% thumbnail post.image "960x339" crop="center" upscale=True as im %}'
+    '{{ im.width }}x{{ im.height }} '
+    '{% endthumbnail %}'
+    '{% endfor %}'
+)
+
+
+def image_upload(name):
+    buffer = BytesIO()
+    Image.new('RGB', (400, 300), 'teal').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+class KVStoreTest(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'kvstore.sqlite3')
+
+    def test_values_survive_restart(self):
+        KVStore(self.path)._set_raw('key', 'value')
+        self.assertEqual(KVStore(self.path)._get_raw('key'), 'value')
+
+    def test_lru_is_bounded(self):
+        store = KVStore(self.path, max_entries=2)
+        for key in ('first', 'second', 'third'):
+            store._set_raw(key, key)
+        self.assertEqual(list(store._lru), ['second', 'third'])
+        self.assertEqual(store._get_raw('first'), 'first')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PrefetchThumbnailsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create_user(username='painter')
+        for number in range(3):
+            Post.objects.create(
+                author=author, text=f'Картина {number}',
+                image=image_upload(f'painting{number}.png'),
+            )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'kvstore.sqlite3')
+        original = default.kvstore._wrapped
+        self.addCleanup(setattr, default.kvstore, '_wrapped', original)
+        default.kvstore._wrapped = KVStore(self.path)
+        self.posts = list(Post.objects.all())
+        for post in self.posts:
+            get_thumbnail(post.image, '960x339', crop='center', upscale=True)
+
+    def test_key_matches_sorl(self):
+        """Ключ считается так же, как его считает get_thumbnail()."""
+        options = {'crop': 'center', 'upscale': True}
+        image = self.posts[0].image
+        self.assertEqual(
+            thumbnail_key(image, '960x339', options),
+            get_thumbnail(image, '960x339', **options).key,
+        )
+
+    def test_page_is_fetched_in_one_query(self):
+        """Записи о миниатюрах всей страницы читаются одним запросом."""
+        store = default.kvstore._wrapped = KVStore(self.path)
+        statements = []
+        store.connection.set_trace_callback(statements.append)
+        output = FEED.render(Context({'posts': self.posts}))
+        self.assertEqual(output.split(), ['960x339'] * 3)
+        self.assertEqual(len(statements), 1)
+        self.assertIn('IN', statements[0])
+
+
+class ThumbnailSizeTest(TestCase):
+    def test_matches_sorl_geometry(self):
+        """Размеры считаются так же, как их считает sorl-thumbnail."""
+        cases = (
+            ((400, 300), {'crop': 'center', 'upscale': True}, (960, 339)),
+            ((400, 300), {}, (400, 300)),
+            ((2000, 1000), {}, (678, 339)),
+            ((2000, 1000), {'crop': 'center'}, (960, 339)),
+            ((500, 100), {'crop': 'center'}, (500, 100)),
+        )
+        for size, options, expected in cases:
+            with self.subTest(size=size, options=options):
+                self.assertEqual(
+                    thumbnail_size(*size, '960x339', **options), expected
+                )
+
+    def test_unknown_size(self):
+        self.assertIsNone(thumbnail_size(None, None, '960x339'))
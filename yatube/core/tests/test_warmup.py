@@ -0,0 +1,15 @@
+import gc
+
+from django.test import SimpleTestCase
+
+from yatube.warmup import warm_up
+
+
+class WarmUpTest(SimpleTestCase):
+    def tearDown(self):
+        gc.unfreeze()
+
+    def test_objects_are_frozen_for_workers(self):
+        """После прогрева объекты уходят в постоянное поколение gc."""
+        warm_up()
+        self.assertGreater(gc.get_freeze_count(), 0)
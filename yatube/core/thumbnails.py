@@ -0,0 +1,176 @@
+"""Хранилище метаданных миниатюр sorl-thumbnail.
+
+Стандартное cached_db хранилище на каждый {% thumbnail %} ходит в кеш, а
+при промахе ещё и в базу — десять раз на страницу ленты. KVStore держит
+записи в ограниченном LRU внутри процесса и сохраняет их во встроенную
+базу SQLite рядом с проектом (THUMBNAIL_KVSTORE_PATH), а prefetch()
+поднимает записи для всей страницы одним запросом.
+
+Запись о миниатюре не меняется: её ключ — хеш исходника и параметров.
+Поэтому LRU другого процесса устареть может только после cleanup() или
+clear(), а в худшем случае sorl заново прочтёт уже готовую миниатюру.
+"""
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import KVStoreBase, add_prefix
+
+# Больше переменных в одном запросе старые сборки SQLite не принимают.
+MAX_VARIABLES = 999
+
+
+class KVStore(KVStoreBase):
+    def __init__(self, path=None, max_entries=None):
+        super().__init__()
+        self.path = path or settings.THUMBNAIL_KVSTORE_PATH
+        self.max_entries = max_entries or settings.THUMBNAIL_LRU_SIZE
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        # Соединение своё у каждого потока и у каждого процесса после
+        # fork: SQLite не разрешает делить их.
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            connection = sqlite3.connect(self.path, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS kvstore '
+                '(key TEXT PRIMARY KEY, value TEXT NOT NULL)'
+            )
+            self._local.connection = connection
+            self._local.pid = pid
+        return self._local.connection
+
+    def _remember(self, key, value, image=None):
+        with self._lock:
+            self._lru[key] = (value, image)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def _forget(self, keys):
+        with self._lock:
+            for key in keys:
+                self._lru.pop(key, None)
+
+    def _lookup(self, key):
+        """Пара (строка, ImageFile или None) из LRU или из SQLite."""
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                self._lru.move_to_end(key)
+                return entry
+        row = self.connection.execute(
+            'SELECT value FROM kvstore WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        self._remember(key, row[0])
+        return row[0], None
+
+    def prefetch(self, image_keys):
+        """Загружает в LRU записи о миниатюрах с ключами image_keys."""
+        with self._lock:
+            missing = [
+                raw_key for raw_key in map(add_prefix, image_keys)
+                if raw_key not in self._lru
+            ]
+        for start in range(0, len(missing), MAX_VARIABLES):
+            batch = missing[start:start + MAX_VARIABLES]
+            rows = self.connection.execute(
+                'SELECT key, value FROM kvstore WHERE key IN '
+                f'({", ".join("?" * len(batch))})',
+                batch,
+            )
+            for key, value in rows:
+                self._remember(key, value)
+
+    def clear(self):
+        super().clear()
+        with self._lock:
+            self._lru.clear()
+
+    def _get(self, key, identity='image'):
+        if identity != 'image':
+            return super()._get(key, identity)
+        # Разобранный ImageFile тоже запоминается: шаблоны его не меняют,
+        # а json.loads на каждую картинку ленты заметен.
+        raw_key = add_prefix(key, identity)
+        entry = self._lookup(raw_key)
+        if entry is None:
+            return None
+        value, image = entry
+        if image is None:
+            image = deserialize_image_file(value)
+            self._remember(raw_key, value, image)
+        return image
+
+    def _get_raw(self, key):
+        entry = self._lookup(key)
+        return None if entry is None else entry[0]
+
+    def _set_raw(self, key, value):
+        self.connection.execute(
+            'INSERT OR REPLACE INTO kvstore (key, value) VALUES (?, ?)',
+            (key, value),
+        )
+        self._remember(key, value)
+
+    def _delete_raw(self, *keys):
+        self.connection.executemany(
+            'DELETE FROM kvstore WHERE key = ?', [(key,) for key in keys]
+        )
+        self._forget(keys)
+
+    def _find_keys_raw(self, prefix):
+        rows = self.connection.execute(
+            'SELECT key FROM kvstore WHERE substr(key, 1, ?) = ?',
+            (len(prefix), prefix),
+        )
+        return [key for key, in rows]
+
+
+def thumbnail_key(file_, geometry, options):
+    """Ключ записи о миниатюре, который запросит get_thumbnail()."""
+    return _thumbnail_key(
+        file_.name, file_.storage, geometry, tuple(sorted(options.items()))
+    )
+
+
+@lru_cache(maxsize=4096)
+def _thumbnail_key(name, storage, geometry, options):
+    source = ImageFile(name, storage)
+    name = sorl_thumbnail_name(source, geometry, dict(options))
+    return ImageFile(name, default.storage).key
+
+
+def sorl_thumbnail_name(source, geometry, options):
+    """Имя файла миниатюры, которое выберет sorl-thumbnail.
+
+    Повторяет начало ThumbnailBackend.get_thumbnail и поэтому опирается
+    на закрытые _get_format и _get_thumbnail_filename. Других обращений
+    к внутренностям backend в проекте нет. Версия sorl-thumbnail
+    закреплена в requirements.txt, а test_key_matches_sorl сверяет ключ
+    с настоящим get_thumbnail: обновление, меняющее расчёт, уронит его.
+    """
+    backend = default.backend
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    return backend._get_thumbnail_filename(source, geometry, options)
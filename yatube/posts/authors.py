@@ -0,0 +1,64 @@
+"""Кеш «имя пользователя → автор» для profile и подписок.
+
+Популярные профили открывают тысячи раз в минуту, и каждый раз искать
+автора по username незачем. В кеше лежат id, имя, фамилия и число
+постов; число постов пересчитывается, когда меняется поколение кеша
+лент (то есть после записи в Post). Несуществующие имена тоже
+кешируются, ненадолго. Сохранение и удаление пользователя сбрасывают
+его запись, а переименование — и запись прежнего имени (см.
+posts.signals).
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count
+from django.http import Http404
+
+from .models import Post
+from .utils import posts_generation
+
+User = get_user_model()
+
+MISSING = 'missing'
+
+
+def cache_key(username):
+    return f'posts:author:{username}'
+
+
+def forget(username):
+    cache.delete(cache_key(username))
+
+
+def get_author(username):
+    """Автор по username или Http404.
+
+    Возвращает объект User, собранный из кеша без запроса к базе: у него
+    заполнены id, username, first_name, last_name и атрибут posts_count.
+    """
+    key = cache_key(username)
+    entry = cache.get(key)
+    if entry == MISSING:
+        raise Http404
+    generation = posts_generation()
+    if entry is None:
+        row = User.objects.filter(username=username).annotate(
+            posts_count=Count('posts')
+        ).values_list('id', 'first_name', 'last_name', 'posts_count').first()
+        if row is None:
+            cache.set(key, MISSING, settings.AUTHOR_MISSING_TIMEOUT)
+            raise Http404
+        entry = (*row, generation)
+        cache.set(key, entry, settings.AUTHOR_CACHE_TIMEOUT)
+    elif entry[-1] != generation:
+        posts_count = Post.objects.filter(author_id=entry[0]).count()
+        entry = (*entry[:3], posts_count, generation)
+        cache.set(key, entry, settings.AUTHOR_CACHE_TIMEOUT)
+    author_id, first_name, last_name, posts_count, _ = entry
+    author = User(
+        id=author_id, username=username,
+        first_name=first_name, last_name=last_name,
+    )
+    author._state.adding = False
+    author.posts_count = posts_count
+    return author
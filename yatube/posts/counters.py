@@ -0,0 +1,172 @@
+"""Отложенная запись счётчиков просмотров постов.
+
+post_detail не пишет в базу на каждый просмотр: приращения копятся в
+общем кеше через cache.incr, так что их видят все воркеры и они
+переживают перезапуск любого из них. Просмотры поста сбрасываются в базу
+через UPDATE views = views + n, когда их набирается
+VIEW_COUNTER_FLUSH_THRESHOLD. Посты с несброшенными просмотрами
+записаны в общий список, и раз в VIEW_COUNTER_FLUSH_INTERVAL секунд
+первый просмотр любого поста сбрасывает их все одной транзакцией — так
+в базу попадают и посты, которые больше никто не открывает. Без
+посещений сайта то же делает команда flush_views.
+"""
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .models import Post
+
+KEY_PREFIX = 'posts:views'
+# id постов, у которых есть несброшенные просмотры.
+PENDING_KEY = f'{KEY_PREFIX}:pending'
+# Время последнего сброса всех постов.
+SWEEP_KEY = f'{KEY_PREFIX}:sweep'
+# Блокировка сброса истекает сама, если воркер упал посередине.
+FLUSH_LOCK_TIMEOUT = 10
+
+
+def lock_key(name):
+    return f'{name}:lock'
+
+
+@contextmanager
+def waiting_lock(name):
+    """Ждёт блокировку name; зависшая истекает за FLUSH_LOCK_TIMEOUT."""
+    deadline = time.monotonic() + FLUSH_LOCK_TIMEOUT
+    while not cache.add(lock_key(name), 1, FLUSH_LOCK_TIMEOUT):
+        if time.monotonic() > deadline:
+            break
+        time.sleep(0.01)
+    try:
+        yield
+    finally:
+        cache.delete(lock_key(name))
+
+
+class ViewCounter:
+    def pending_key(self, post_id):
+        return f'{KEY_PREFIX}:{post_id}'
+
+    def listed_key(self, post_id):
+        return f'{KEY_PREFIX}:{post_id}:listed'
+
+    def add(self, post_id):
+        """Учитывает просмотр и возвращает число несброшенных просмотров.
+
+        Число включает и этот просмотр, даже если он сразу ушёл в базу.
+        """
+        key = self.pending_key(post_id)
+        cache.add(key, 0, None)
+        count = cache.incr(key)
+        self.remember(post_id)
+        if count >= settings.VIEW_COUNTER_FLUSH_THRESHOLD:
+            self.flush(post_id)
+        if self.sweep_due():
+            self.flush_pending()
+        return count
+
+    def remember(self, post_id):
+        """Добавляет пост в список постов с несброшенными просмотрами."""
+        # Отметка ставится один раз до ближайшего общего сброса, поэтому
+        # список переписывается не на каждый просмотр.
+        if not cache.add(self.listed_key(post_id), 1, None):
+            return
+        with waiting_lock(PENDING_KEY):
+            post_ids = cache.get(PENDING_KEY, set())
+            post_ids.add(post_id)
+            cache.set(PENDING_KEY, post_ids, None)
+
+    def sweep_due(self):
+        """Пора ли сбросить все посты: раз в VIEW_COUNTER_FLUSH_INTERVAL.
+
+        Первый просмотр после пустого кеша только запоминает время.
+        """
+        now = time.time()
+        last = cache.get(SWEEP_KEY)
+        if last is None:
+            cache.add(SWEEP_KEY, now, None)
+            return False
+        if now - last < settings.VIEW_COUNTER_FLUSH_INTERVAL:
+            return False
+        cache.set(SWEEP_KEY, now, None)
+        return True
+
+    def pending(self, post_id):
+        """Просмотры поста, ещё не записанные в базу."""
+        return cache.get(self.pending_key(post_id), 0)
+
+    def flush(self, post_id):
+        """Переносит накопленные просмотры поста в базу."""
+        lock = lock_key(self.pending_key(post_id))
+        if not cache.add(lock, 1, FLUSH_LOCK_TIMEOUT):
+            return
+        try:
+            key = self.pending_key(post_id)
+            count = cache.get(key, 0)
+            if not count:
+                return
+            # Просмотры, пришедшие после get, остаются в счётчике.
+            cache.decr(key, count)
+            try:
+                Post.objects.filter(pk=post_id).update(
+                    views=F('views') + count
+                )
+            except Exception:
+                cache.incr(key, count)
+                raise
+        finally:
+            cache.delete(lock)
+
+    def flush_pending(self):
+        """Переносит в базу просмотры всех постов из списка.
+
+        Все UPDATE идут одной транзакцией. Возвращает число постов,
+        просмотры которых записаны.
+        """
+        with waiting_lock(PENDING_KEY):
+            post_ids = cache.get(PENDING_KEY, set())
+            cache.delete(PENDING_KEY)
+            # Просмотр, пришедший после этого, снова внесёт пост в список.
+            cache.delete_many([self.listed_key(pk) for pk in post_ids])
+        # Посты, которые прямо сейчас сбрасывает flush, он и запишет.
+        locked = [
+            pk for pk in post_ids
+            if cache.add(lock_key(self.pending_key(pk)), 1,
+                         FLUSH_LOCK_TIMEOUT)
+        ]
+        try:
+            counts = cache.get_many([self.pending_key(pk) for pk in locked])
+            taken = {}
+            for pk in locked:
+                count = counts.get(self.pending_key(pk), 0)
+                if count:
+                    cache.decr(self.pending_key(pk), count)
+                    taken[pk] = count
+            # Постов с одинаковым приращением обычно много, поэтому
+            # UPDATE идёт на каждое число, а не на каждый пост.
+            by_count = {}
+            for pk, count in taken.items():
+                by_count.setdefault(count, []).append(pk)
+            try:
+                with transaction.atomic():
+                    for count, pks in by_count.items():
+                        Post.objects.filter(pk__in=pks).update(
+                            views=F('views') + count
+                        )
+            except Exception:
+                for pk, count in taken.items():
+                    cache.incr(self.pending_key(pk), count)
+                    self.remember(pk)
+                raise
+            return len(taken)
+        finally:
+            cache.delete_many(
+                [lock_key(self.pending_key(pk)) for pk in locked]
+            )
+
+
+view_counter = ViewCounter()
@@ -0,0 +1,80 @@
+"""Кешированные подписки пользователя.
+
+Множество id авторов, на которых подписан пользователь, хранится в кеше
+компактным отсортированным array('q') и загружается из базы один раз.
+profile_follow и profile_unfollow правят его после записи без запроса
+к базе. Внутри запроса множество запоминается на объекте пользователя,
+так что любое число проверок «подписан ли читатель на автора» — это
+поиск во frozenset. Номер версии подписок входит в ключи кеша ленты
+подписок: после follow/unfollow устаревают только они, а не кеш всех
+лент сразу.
+"""
+from array import array
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Follow
+
+
+def cache_key(user_id):
+    return f'posts:following:{user_id}'
+
+
+def version_key(user_id):
+    return f'posts:following:{user_id}:version'
+
+
+def version(user):
+    """Номер версии подписок user; растёт при каждой подписке и отписке."""
+    value = cache.get(version_key(user.id))
+    if value is None:
+        cache.add(version_key(user.id), 1, None)
+        value = cache.get(version_key(user.id), 1)
+    return value
+
+
+def load(user):
+    ids = array('q', sorted(
+        Follow.objects.filter(user=user).values_list('author_id', flat=True)
+    ))
+    cache.set(cache_key(user.id), ids, settings.FOLLOWING_CACHE_TIMEOUT)
+    return ids
+
+
+def followed_ids(user):
+    """frozenset id авторов, на которых подписан user."""
+    if not user.is_authenticated:
+        return frozenset()
+    memo = getattr(user, '_followed_ids', None)
+    if memo is None:
+        ids = cache.get(cache_key(user.id))
+        if ids is None:
+            ids = load(user)
+        memo = user._followed_ids = frozenset(ids)
+    return memo
+
+
+def update(user, author_id, followed):
+    """Отражает в кеше подписку (followed=True) или отписку.
+
+    Если множества в кеше нет, оно загрузится при следующем чтении.
+    """
+    try:
+        cache.incr(version_key(user.id))
+    except ValueError:
+        cache.add(version_key(user.id), 1, None)
+    ids = cache.get(cache_key(user.id))
+    if ids is None:
+        user._followed_ids = None
+        return
+    ids = set(ids)
+    if followed:
+        ids.add(author_id)
+    else:
+        ids.discard(author_id)
+    cache.set(
+        cache_key(user.id), array('q', sorted(ids)),
+        settings.FOLLOWING_CACHE_TIMEOUT,
+    )
+    user._followed_ids = frozenset(ids)
@@ -1,9 +1,46 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
+from .images import prepare_upload, upload_metadata
 from .models import Comment, Post
 
 
 class PostForm(forms.ModelForm):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # ImageUploadHandler подставляет RejectedUpload вместо картинки,
+        # отклонённой во время загрузки.
+        self.image_rejection = getattr(
+            self.files.get('image'), 'rejection', None
+        )
+        if self.image_rejection:
+            self.files = self.files.copy()
+            del self.files['image']
+
+    def clean_image(self):
+        if self.image_rejection:
+            raise forms.ValidationError(self.image_rejection)
+        image = self.cleaned_data['image']
+        # При редактировании без новой картинки здесь FieldFile.
+        if isinstance(image, UploadedFile):
+            return prepare_upload(image)
+        return image
+
+    def save(self, commit=True):
+        image = self.cleaned_data.get('image')
+        if isinstance(image, UploadedFile):
+            metadata = upload_metadata(image)
+        elif not image:
+            metadata = dict.fromkeys(
+                ('image_width', 'image_height', 'image_size'), None
+            )
+            metadata['image_hash'] = ''
+        else:
+            metadata = {}
+        for field, value in metadata.items():
+            setattr(self.instance, field, value)
+        return super().save(commit)
+
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
@@ -0,0 +1,377 @@
+"""Пережатие оригиналов картинок постов и удаление метаданных.
+
+Страницы показывают картинки шириной не больше 960 пикселей, а
+загружаются снимки с телефонов в несколько раз больше и с EXIF. Перед
+сохранением JPEG и PNG уменьшаются до POST_IMAGE_MAX_SIDE по длинной
+стороне и пережимаются, если это заметно уменьшает файл.
+
+EXIF с геометкой, XMP, IPTC и комментарии удаляются из любой картинки,
+даже если пережимать её незачем: из JPEG, PNG, GIF и WebP они
+вырезаются по байтам, без перекодирования. GIF и WebP не пережимаются:
+анимацию при этом легко потерять.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import struct
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image, ImageOps
+
+from .models import Post
+from .uploadhandlers import SIGNATURES
+
+logger = logging.getLogger(__name__)
+
+# Пережатая картинка сохраняется, только если она меньше оригинала хотя
+# бы на 5%: иначе повторный прогон optimize_media пережимал бы JPEG снова
+# и снова. Метаданные удаляются независимо от выигрыша.
+MIN_SAVINGS = 0.05
+EXIF_ORIENTATION = 0x0112
+
+# APP1 (EXIF, XMP), APP13 (IPTC) и комментарий. APP0 (JFIF), APP2 (ICC)
+# и APP14 (Adobe) нужны для правильных цветов и остаются.
+JPEG_METADATA = {0xE1, 0xED, 0xFE}
+JPEG_SCAN = 0xDA
+PNG_METADATA = {b'eXIf', b'tEXt', b'iTXt', b'zTXt', b'tIME'}
+WEBP_METADATA = {b'EXIF', b'XMP '}
+# Флаги EXIF и XMP в заголовке VP8X.
+WEBP_METADATA_FLAGS = 0x08 | 0x04
+
+
+def save_options(image_format, quality):
+    if image_format == 'JPEG':
+        return {'quality': quality, 'optimize': True, 'progressive': True}
+    return {'optimize': True}
+
+
+def optimize(source, max_side, quality):
+    """Возвращает пережатую картинку (bytes, width, height) или None.
+
+    None означает, что формат не пережимается; source — путь или открытый
+    файл. С max_side=None картинка только поворачивается по EXIF.
+    """
+    with Image.open(source) as original:
+        image_format = original.format
+        if image_format not in ('JPEG', 'PNG'):
+            return None
+        image = ImageOps.exif_transpose(original)
+    icc_profile = image.info.get('icc_profile')
+    transparency = image.info.get('transparency')
+    # EXIF (с геометкой), комментарии и прочие метаданные не сохраняются.
+    image.info = {}
+    if max_side is not None:
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+    options = save_options(image_format, quality)
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+    if transparency is not None and image_format == 'PNG':
+        options['transparency'] = transparency
+    buffer = BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue(), image.width, image.height
+
+
+def strip_jpeg(data):
+    parts = [data[:2]]
+    position = 2
+    while data[position] == 0xFF:
+        marker = data[position + 1]
+        if marker == 0xFF:
+            # Байт-заполнитель перед маркером.
+            position += 1
+            continue
+        if marker == JPEG_SCAN:
+            break
+        length, = struct.unpack('>H', data[position + 2:position + 4])
+        end = position + 2 + length
+        if marker not in JPEG_METADATA:
+            parts.append(data[position:end])
+        position = end
+    parts.append(data[position:])
+    return b''.join(parts)
+
+
+def strip_png(data):
+    parts = [data[:8]]
+    position = 8
+    while position < len(data):
+        length, kind = struct.unpack('>I4s', data[position:position + 8])
+        end = position + 12 + length
+        if kind not in PNG_METADATA:
+            parts.append(data[position:end])
+        position = end
+    return b''.join(parts)
+
+
+def skip_sub_blocks(data, position):
+    """Позиция после цепочки подблоков GIF, заканчивающейся нулём."""
+    while data[position]:
+        position += data[position] + 1
+    return position + 1
+
+
+def color_table_size(flags):
+    return 3 * 2 ** ((flags & 0x07) + 1) if flags & 0x80 else 0
+
+
+def strip_gif(data):
+    position = 13 + color_table_size(data[10])
+    parts = [data[:position]]
+    while data[position] != 0x3B:
+        if data[position] == 0x21:
+            label = data[position + 1]
+            end = skip_sub_blocks(data, position + 2)
+            # Комментарии и XMP; NETSCAPE2.0 с числом повторов остаётся.
+            metadata = label == 0xFE or (
+                label == 0xFF
+                and data[position + 3:position + 11] == b'XMP Data'
+            )
+        elif data[position] == 0x2C:
+            start = position + 10 + color_table_size(data[position + 9])
+            # Первый байт данных кадра — минимальная длина кода LZW.
+            end = skip_sub_blocks(data, start + 1)
+            metadata = False
+        else:
+            raise ValueError('Неизвестный блок GIF.')
+        if not metadata:
+            parts.append(data[position:end])
+        position = end
+    parts.append(data[position:])
+    return b''.join(parts)
+
+
+def strip_webp(data):
+    if data[8:12] != b'WEBP':
+        raise ValueError('RIFF без WebP.')
+    parts = [b'WEBP']
+    position = 12
+    while position < len(data):
+        kind, size = struct.unpack('<4sI', data[position:position + 8])
+        end = position + 8 + size + size % 2
+        chunk = data[position:end]
+        if kind == b'VP8X':
+            flags = chunk[8] & ~WEBP_METADATA_FLAGS
+            chunk = chunk[:8] + bytes([flags]) + chunk[9:]
+        if kind not in WEBP_METADATA:
+            parts.append(chunk)
+        position = end
+    body = b''.join(parts)
+    return b'RIFF' + struct.pack('<I', len(body)) + body
+
+
+STRIPPERS = {
+    'jpeg': strip_jpeg,
+    'png': strip_png,
+    'gif': strip_gif,
+    'webp': strip_webp,
+}
+
+
+def strip_metadata(data):
+    """Вырезает метаданные без перекодирования.
+
+    Возвращает None, если вырезать нечего или формат не разобрать.
+    """
+    for signature, image_format in SIGNATURES:
+        if data.startswith(signature):
+            break
+    else:
+        return None
+    try:
+        stripped = STRIPPERS[image_format](data)
+    except (IndexError, ValueError, struct.error):
+        return None
+    return stripped if len(stripped) < len(data) else None
+
+
+def is_rotated(data):
+    """Повёрнут ли снимок тегом EXIF: без EXIF он повернётся обратно."""
+    with Image.open(BytesIO(data)) as image:
+        return image.getexif().get(EXIF_ORIENTATION, 1) != 1
+
+
+def process(data, max_side, quality):
+    """Что сохранить вместо data: (bytes, width, height) или None.
+
+    None — картинку можно оставить как есть. Пережатая картинка
+    выбирается, если она меньше на MIN_SAVINGS или снимок нужно повернуть
+    по EXIF; иначе из оригинала только вырезаются метаданные. С
+    max_side=None картинка пережимается лишь ради поворота.
+    """
+    rotated = is_rotated(data)
+    if max_side is not None or rotated:
+        result = optimize(BytesIO(data), max_side, quality)
+        if result is not None and (
+            rotated or len(result[0]) <= len(data) * (1 - MIN_SAVINGS)
+        ):
+            return result
+    stripped = strip_metadata(data)
+    if stripped is None:
+        return None
+    with Image.open(BytesIO(stripped)) as image:
+        width, height = image.size
+    return stripped, width, height
+
+
+def prepare_upload(upload):
+    """Пережимает загруженный файл для PostForm и вырезает метаданные.
+
+    Возвращает новый файл с пересчитанными content_hash и размерами или
+    исходный, если менять нечего. Пережатие отключается
+    POST_IMAGE_OPTIMIZE, удаление метаданных — нет.
+    """
+    upload.seek(0)
+    before = upload.read()
+    upload.seek(0)
+    max_side = (
+        settings.POST_IMAGE_MAX_SIDE if settings.POST_IMAGE_OPTIMIZE
+        else None
+    )
+    result = process(before, max_side, settings.POST_IMAGE_QUALITY)
+    if result is None:
+        return upload
+    data, width, height = result
+    logger.info(
+        'Картинка %s обработана: %d → %d байт.',
+        upload.name, len(before), len(data)
+    )
+    prepared = SimpleUploadedFile(upload.name, data, upload.content_type)
+    prepared.content_hash = hashlib.sha256(data).hexdigest()
+    prepared.image_width = width
+    prepared.image_height = height
+    return prepared
+
+
+def optimize_file(path, max_side, quality):
+    """Пережимает файл на месте и возвращает (было байт, стало байт, поля).
+
+    Поля — размеры, вес и хеш нового файла для Post или None, если файл
+    не изменился. Вызывается в процессах optimize_media, поэтому
+    настройки передаются аргументами. Файл подменяется атомарно через
+    os.replace.
+    """
+    with open(path, 'rb') as file:
+        before = file.read()
+    try:
+        result = process(before, max_side, quality)
+    except (OSError, Image.DecompressionBombError):
+        logger.warning('Не удалось открыть картинку %s.', path)
+        return len(before), len(before), None
+    if result is None:
+        return len(before), len(before), None
+    data, width, height = result
+    directory, name = os.path.split(path)
+    descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=name)
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            file.write(data)
+        # mkstemp создаёт файл с правами 0600, веб-сервер его не прочтёт.
+        shutil.copymode(path, temporary)
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+    metadata = {
+        'image_width': width,
+        'image_height': height,
+        'image_size': len(data),
+        'image_hash': hashlib.sha256(data).hexdigest(),
+    }
+    return len(before), len(data), metadata
+
+
+def file_hash(file):
+    file.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file.read(64 * 1024), b''):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def upload_metadata(upload):
+    """Поля Post с размерами, весом и хешем загруженной картинки.
+
+    Обычно всё уже посчитано по ходу загрузки (ImageUploadHandler,
+    prepare_upload, assembled_file), и файл заново не читается.
+    """
+    width = getattr(upload, 'image_width', None)
+    height = getattr(upload, 'image_height', None)
+    if width is None or height is None:
+        # forms.ImageField оставляет открытую при проверке картинку.
+        width, height = upload.image.size
+    content_hash = getattr(upload, 'content_hash', None)
+    return {
+        'image_width': width,
+        'image_height': height,
+        'image_size': upload.size,
+        'image_hash': content_hash or file_hash(upload),
+    }
+
+
+def file_metadata(path):
+    """То же для файла на диске; вызывается в процессах backfill_images.
+
+    Для нечитаемого файла возвращает None.
+    """
+    try:
+        with Image.open(path) as image:
+            width, height = image.size
+        with open(path, 'rb') as file:
+            content_hash = file_hash(file)
+    except (OSError, Image.DecompressionBombError):
+        logger.warning('Не удалось открыть картинку %s.', path)
+        return None
+    return {
+        'image_width': width,
+        'image_height': height,
+        'image_size': os.path.getsize(path),
+        'image_hash': content_hash,
+    }
+
+
+METADATA_FIELDS = ('image_width', 'image_height', 'image_size', 'image_hash')
+
+
+def update_image_files(posts, work, workers, batch_size, metadata=None):
+    """Обрабатывает файлы картинок постов в нескольких процессах.
+
+    work(path) вызывается в процессах для каждого файла, который есть на
+    диске; одна картинка нескольких постов обрабатывается один раз.
+    metadata(result) достаёт из результата поля METADATA_FIELDS или None,
+    если записывать нечего; по умолчанию результат и есть эти поля. В
+    базу пишет только этот процесс, через bulk_update пачками по
+    batch_size. Возвращает результаты work по файлам и число обновлённых
+    постов.
+    """
+    names = {}
+    for post_id, name in posts.exclude(image='').values_list('id', 'image'):
+        names.setdefault(name, []).append(post_id)
+    paths = {}
+    for name in names:
+        path = os.path.join(settings.MEDIA_ROOT, name)
+        if os.path.exists(path):
+            paths[name] = path
+    results = []
+    updated = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for name, result in zip(
+            paths, pool.map(work, paths.values(), chunksize=8)
+        ):
+            results.append(result)
+            fields = result if metadata is None else metadata(result)
+            if fields is None:
+                continue
+            updated.extend(
+                Post(id=post_id, **fields) for post_id in names[name]
+            )
+    Post.objects.bulk_update(updated, METADATA_FIELDS, batch_size=batch_size)
+    return results, len(updated)
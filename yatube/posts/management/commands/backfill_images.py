@@ -0,0 +1,33 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from posts.images import file_metadata, update_image_files
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет размеры, вес и хеш картинок постов, загруженных до '
+        'появления этих полей. Файлы читаются в нескольких процессах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Сколько процессов читают картинки одновременно.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько постов обновлять одним запросом.',
+        )
+
+    def handle(self, *args, **options):
+        results, updated = update_image_files(
+            Post.objects.filter(image_width__isnull=True), file_metadata,
+            options['workers'], options['batch_size'],
+        )
+        self.stdout.write(
+            f'Заполнено постов: {updated}, '
+            f'картинок прочитано: {len(results)}.'
+        )
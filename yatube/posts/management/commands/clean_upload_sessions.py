@@ -0,0 +1,24 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts import uploads
+from posts.models import UploadSession
+
+
+class Command(BaseCommand):
+    help = 'Удаляет незавершённые загрузки старше UPLOAD_SESSION_TTL.'
+
+    def handle(self, *args, **options):
+        expired = UploadSession.objects.filter(
+            created__lt=timezone.now() - datetime.timedelta(
+                seconds=settings.UPLOAD_SESSION_TTL
+            )
+        )
+        count = 0
+        for session in expired.iterator():
+            uploads.discard(session)
+            count += 1
+        self.stdout.write(f'Удалено загрузок: {count}.')
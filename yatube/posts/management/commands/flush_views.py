@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import view_counter
+
+
+class Command(BaseCommand):
+    help = (
+        'Записывает в базу просмотры, накопленные в кеше, для всех постов '
+        'сразу.'
+    )
+
+    def handle(self, *args, **options):
+        count = view_counter.flush_pending()
+        self.stdout.write(f'Записаны просмотры постов: {count}.')
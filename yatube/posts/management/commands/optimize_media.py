@@ -0,0 +1,45 @@
+import os
+from functools import partial
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.images import optimize_file, update_image_files
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Пережимает уже загруженные картинки постов в нескольких '
+        'процессах и выводит, сколько места удалось освободить.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Сколько процессов пережимают картинки одновременно.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько постов обновлять одним запросом.',
+        )
+
+    def handle(self, *args, **options):
+        work = partial(
+            optimize_file,
+            max_side=settings.POST_IMAGE_MAX_SIDE,
+            quality=settings.POST_IMAGE_QUALITY,
+        )
+        # Размеры, вес и хеш в Post должны описывать новый файл.
+        results, _ = update_image_files(
+            Post.objects.all(), work, options['workers'],
+            options['batch_size'], metadata=itemgetter(2),
+        )
+        before = sum(old_size for old_size, _, _ in results)
+        after = sum(new_size for _, new_size, _ in results)
+        optimized = sum(metadata is not None for _, _, metadata in results)
+        self.stdout.write(
+            f'Пережато картинок: {optimized} из {len(results)}, '
+            f'освобождено {(before - after) // 1024} КБ.'
+        )
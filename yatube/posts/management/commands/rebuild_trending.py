@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рейтинг страницы «Популярное» с нуля.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.TRENDING_BATCH_SIZE,
+            help='Сколько постов пересчитывать за одну транзакцию.',
+        )
+
+    def handle(self, *args, **options):
+        count = trending.rebuild(options['batch_size'])
+        self.stdout.write(f'Пересчитан рейтинг {count} постов.')
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import suggestions
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рекомендации «кого почитать» для пользователей, '
+        'чьи подписки изменились.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            dest='everyone',
+            help='Пересчитать рекомендации всех пользователей.',
+        )
+
+    def handle(self, *args, **options):
+        count = suggestions.refresh(
+            settings.SUGGESTIONS_LIMIT, everyone=options['everyone']
+        )
+        self.stdout.write(f'Обновлены рекомендации {count} пользователей.')
@@ -0,0 +1,47 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:43
+
+from django.db import migrations, models
+
+# Копия posts.utils.make_excerpt на момент миграции: последующие правки
+# функции и настройки POST_EXCERPT_LENGTH не должны менять её результат.
+EXCERPT_LENGTH = 300
+
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    text = text.strip()
+    if len(text) <= length:
+        return text
+    cut = text[:length]
+    if not text[length].isspace():
+        cut = cut.rsplit(None, 1)[0]
+    return cut.rstrip(' \n\r\t.,;:!?—-') + '…'
+
+
+def fill_excerpts(apps, schema_editor):
+    """Считает начало текста для уже написанных постов."""
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.only('id', 'text').iterator(chunk_size=500)
+    batch = []
+    for post in posts:
+        post.excerpt = make_excerpt(post.text)
+        batch.append(post)
+        if len(batch) == 500:
+            Post.objects.bulk_update(batch, ['excerpt'])
+            batch = []
+    Post.objects.bulk_update(batch, ['excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0023_post_image_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, verbose_name='Начало текста'),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0024_post_excerpt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stalesuggestions',
+            name='marked',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
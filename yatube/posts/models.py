@@ -1,6 +1,12 @@
+import os
+import uuid
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .utils import make_excerpt
+
 User = get_user_model()
 
 
@@ -55,10 +61,50 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    # Заполняются при загрузке, чтобы страницам не открывать оригинал.
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки',
+        null=True,
+        editable=False,
+    )
+    image_height = models.PositiveIntegerField(
+        'Высота картинки',
+        null=True,
+        editable=False,
+    )
+    image_size = models.PositiveIntegerField(
+        'Размер картинки в байтах',
+        null=True,
+        editable=False,
+    )
+    image_hash = models.CharField(
+        'SHA-256 картинки',
+        max_length=64,
+        blank=True,
+        editable=False,
+    )
+    views = models.PositiveIntegerField(
+        'Просмотры',
+        default=0,
+        editable=False,
+    )
+    # Ленты показывают только начало поста и не загружают text целиком.
+    excerpt = models.TextField(
+        'Начало текста',
+        blank=True,
+        editable=False,
+    )
 
     def __str__(self):
         return self.text
 
+    def save(self, *args, update_fields=None, **kwargs):
+        if update_fields is None or 'text' in update_fields:
+            self.excerpt = make_excerpt(self.text)
+            if update_fields is not None:
+                update_fields = {*update_fields, 'excerpt'}
+        super().save(*args, update_fields=update_fields, **kwargs)
+
     class Meta():
         verbose_name = 'Пост'
         ordering = ('-pub_date',)
@@ -84,19 +130,127 @@ class Comment(models.Model):
     class Meta():
         ordering = ('-created',)
         verbose_name = 'Комментарий'
+        indexes = (
+            models.Index(
+                fields=('post', '-created'),
+                name='comment_post_created_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text
 
 
 class Follow(models.Model):
+    # Отдельный индекс по user не нужен: его покрывает unique_follow.
     user = models.ForeignKey(
         User,
         related_name='follower',
         on_delete=models.CASCADE,
+        db_index=False,
     )
     author = models.ForeignKey(
         User,
         related_name='following',
         on_delete=models.CASCADE,
     )
+
+    class Meta():
+        verbose_name = 'Подписка'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow'
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='prevent_self_follow'
+            ),
+        )
+
+
+class TrendingPost(models.Model):
+    """Предрассчитанный рейтинг поста для страницы «Популярное».
+
+    score хранит логарифм суммы весов событий (публикация поста и
+    комментарии), поэтому новое событие добавляется без пересчёта
+    остальных, а порядок по score совпадает с порядком по затухающей
+    активности на любой момент времени. См. posts.trending.
+    """
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+    )
+    score = models.FloatField('Рейтинг', db_index=True)
+
+    class Meta():
+        verbose_name = 'Популярный пост'
+
+
+class FollowSuggestion(models.Model):
+    """Автор, на которого стоит подписаться пользователю.
+
+    overlap — сколько авторов из подписок пользователя уже читают
+    рекомендуемого. Таблицу заполняет posts.suggestions.refresh.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions',
+        db_index=False,
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    overlap = models.PositiveIntegerField('Общих подписок')
+
+    class Meta():
+        verbose_name = 'Рекомендация подписки'
+        ordering = ('-overlap',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow_suggestion'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-overlap'),
+                name='suggestion_user_overlap_idx'
+            ),
+        )
+
+
+class StaleSuggestions(models.Model):
+    """Пользователь, чьи подписки изменились после расчёта рекомендаций."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+',
+    )
+    marked = models.DateTimeField(auto_now=True)
+
+
+class UploadSession(models.Model):
+    """Загрузка картинки по частям; байты копятся в файле path()."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions',
+    )
+    file_name = models.CharField('Имя файла', max_length=255)
+    size = models.PositiveIntegerField('Размер файла')
+    received = models.PositiveIntegerField('Получено байт', default=0)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta():
+        verbose_name = 'Загрузка по частям'
+
+    def path(self):
+        return os.path.join(settings.UPLOAD_SESSIONS_ROOT, str(self.id))
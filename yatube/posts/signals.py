@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import authors
+from .models import Post
+from .utils import invalidate_posts_cache
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, **kwargs):
+    invalidate_posts_cache()
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, update_fields=None, **kwargs):
+    """Запоминает имя из базы: после переименования сбросится и оно.
+
+    Сохранения, которые не трогают username (например, last_login при
+    входе), обходятся без лишнего запроса.
+    """
+    if instance._state.adding:
+        return
+    if update_fields is not None and 'username' not in update_fields:
+        return
+    instance._stored_username = User.objects.filter(
+        pk=instance.pk
+    ).values_list('username', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    authors.forget(instance.username)
+    stored = instance.__dict__.pop('_stored_username', None)
+    if stored and stored != instance.username:
+        authors.forget(stored)
@@ -0,0 +1,122 @@
+"""Рекомендации «кого почитать» по графу подписок.
+
+Рекомендуются авторы, которых читают авторы из подписок пользователя;
+чем больше таких общих подписок, тем выше автор в списке. Граф целиком
+загружается в память в компактном виде, а результаты сохраняются в
+FollowSuggestion, так что страницы читают готовый список одним запросом.
+"""
+import heapq
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Follow, FollowSuggestion, StaleSuggestions
+
+BATCH_SIZE = 500
+
+
+class FollowGraph:
+    """Граф подписок в формате CSR.
+
+    Подписки пользователя users[i] лежат в
+    authors[offsets[i]:offsets[i + 1]]; оба массива — array('q'),
+    поэтому граф занимает по восемь байт на подписку.
+    """
+
+    def __init__(self, edges):
+        self.users = array('q')
+        self.offsets = array('q', [0])
+        self.authors = array('q')
+        for user_id, author_id in edges:
+            if not self.users or self.users[-1] != user_id:
+                if self.users:
+                    self.offsets.append(len(self.authors))
+                self.users.append(user_id)
+            self.authors.append(author_id)
+        if self.users:
+            self.offsets.append(len(self.authors))
+
+    @classmethod
+    def load(cls):
+        edges = Follow.objects.order_by('user_id').values_list(
+            'user_id', 'author_id'
+        )
+        return cls(edges.iterator())
+
+    def following(self, user_id):
+        position = bisect_left(self.users, user_id)
+        if position == len(self.users) or self.users[position] != user_id:
+            return self.authors[0:0]
+        start, end = self.offsets[position], self.offsets[position + 1]
+        return self.authors[start:end]
+
+    def suggest(self, user_id, limit):
+        """Возвращает до limit пар (author_id, overlap) для пользователя."""
+        followed = self.following(user_id)
+        overlap = Counter()
+        for author_id in followed:
+            overlap.update(self.following(author_id))
+        for author_id in followed:
+            overlap.pop(author_id, None)
+        overlap.pop(user_id, None)
+        return heapq.nlargest(
+            limit, overlap.items(), key=lambda item: (item[1], -item[0])
+        )
+
+
+def batches(ids):
+    """Режет список на части, влезающие в лимит параметров SQLite."""
+    for start in range(0, len(ids), BATCH_SIZE):
+        yield ids[start:start + BATCH_SIZE]
+
+
+def mark_stale(user):
+    """Помечает рекомендации пользователя к пересчёту."""
+    # save() с известным ключом — это UPDATE, а при его промахе INSERT.
+    # marked сдвигается и у старой пометки: пересчёт, начатый раньше,
+    # её не удалит.
+    StaleSuggestions(user=user).save()
+
+
+def refresh(limit, everyone=False):
+    """Пересчитывает рекомендации и возвращает число пользователей.
+
+    По умолчанию пересчитываются только помеченные через mark_stale,
+    с everyone=True — все. Рекомендации считаются вне транзакции, а
+    записываются короткой транзакцией на каждую пачку пользователей.
+    Снимаются только пометки, поставленные до начала расчёта: пометки,
+    появившиеся во время него, доживут до следующего запуска.
+    """
+    started = timezone.now()
+    graph = FollowGraph.load()
+    if everyone:
+        # Пользователи, отписавшиеся от всех, есть только в старых
+        # рекомендациях: их списки тоже нужно очистить.
+        user_ids = sorted(set(graph.users).union(
+            FollowSuggestion.objects.values_list('user_id', flat=True)
+        ))
+    else:
+        user_ids = list(
+            StaleSuggestions.objects.filter(marked__lte=started)
+            .values_list('user_id', flat=True)
+        )
+    for batch in batches(user_ids):
+        suggestions = [
+            FollowSuggestion(
+                user_id=user_id, author_id=author_id, overlap=overlap
+            )
+            for user_id in batch
+            for author_id, overlap in graph.suggest(user_id, limit)
+        ]
+        with transaction.atomic():
+            FollowSuggestion.objects.filter(user_id__in=batch).delete()
+            FollowSuggestion.objects.bulk_create(suggestions)
+            StaleSuggestions.objects.filter(
+                user_id__in=batch, marked__lte=started
+            ).delete()
+    if everyone:
+        StaleSuggestions.objects.filter(marked__lte=started).delete()
+    return len(user_ids)
@@ -0,0 +1,11 @@
+from django import template
+
+from ..following import followed_ids
+
+register = template.Library()
+
+
+@register.filter
+def followed_by(author_id, user):
+    """{% if post.author_id|followed_by:user %} без запросов к базе."""
+    return author_id in followed_ids(user)
@@ -0,0 +1,19 @@
+from django import template
+
+from .. import utils
+
+register = template.Library()
+
+
+@register.filter
+def elided_page_range(page_obj):
+    paginator = page_obj.paginator
+    if hasattr(paginator, 'get_elided_page_range'):
+        return paginator.get_elided_page_range(page_obj.number)
+    return paginator.page_range
+
+
+@register.filter
+def feed_cursor(page_obj):
+    """Курсор, с которого фрагмент ленты продолжает страницу."""
+    return utils.feed_cursor(page_obj[len(page_obj) - 1])
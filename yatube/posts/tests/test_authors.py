@@ -0,0 +1,73 @@
+from django.core.cache import cache
+from django.http import Http404
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..authors import get_author
+from ..models import Post, User
+
+
+class AuthorResolverTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='famous', first_name='Лев', last_name='Толстой'
+        )
+        Post.objects.create(text='Первый', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_author_is_cached(self):
+        """Автор ищется в базе один раз, дальше — из кеша."""
+        with self.assertNumQueries(1):
+            author = get_author('famous')
+        with self.assertNumQueries(0):
+            author = get_author('famous')
+        self.assertEqual(author, self.user)
+        self.assertEqual(author.get_full_name(), 'Лев Толстой')
+        self.assertEqual(author.posts_count, 1)
+
+    def test_posts_count_follows_post_writes(self):
+        get_author('famous')
+        Post.objects.create(text='Второй', author=self.user)
+        with self.assertNumQueries(1):
+            self.assertEqual(get_author('famous').posts_count, 2)
+
+    def test_unknown_name_is_cached_until_user_saved(self):
+        with self.assertRaises(Http404):
+            get_author('newcomer')
+        with self.assertNumQueries(0), self.assertRaises(Http404):
+            get_author('newcomer')
+        User.objects.create_user(username='newcomer')
+        self.assertEqual(get_author('newcomer').username, 'newcomer')
+
+    def test_user_save_resets_entry(self):
+        get_author('famous')
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Алексей'
+        user.save()
+        self.assertEqual(get_author('famous').first_name, 'Алексей')
+
+    def test_renamed_user_frees_old_name(self):
+        """После переименования старый адрес профиля отдаёт 404."""
+        client = Client()
+        old_url = reverse('posts:profile', args=('famous',))
+        self.assertEqual(client.get(old_url).status_code, 200)
+        user = User.objects.get(pk=self.user.pk)
+        user.username = 'classic'
+        user.save()
+        self.assertEqual(client.get(old_url).status_code, 404)
+        response = client.get(reverse('posts:profile', args=('classic',)))
+        self.assertEqual(response.status_code, 200)
+
+    def test_profile_uses_resolver(self):
+        client = Client()
+        self.assertEqual(
+            client.get(reverse('posts:profile', args=('nobody',))).status_code,
+            404,
+        )
+        response = client.get(reverse('posts:profile', args=('famous',)))
+        self.assertEqual(response.context['posts_count'], 1)
+        self.assertEqual(response.context['author'], self.user)
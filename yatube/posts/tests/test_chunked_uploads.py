@@ -0,0 +1,115 @@
+import datetime
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from ..models import Post, UploadSession, User
+
+TEMP_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_MEDIA_ROOT = os.path.join(TEMP_ROOT, 'media')
+TEMP_UPLOADS_ROOT = os.path.join(TEMP_ROOT, 'uploads')
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT, UPLOAD_SESSIONS_ROOT=TEMP_UPLOADS_ROOT
+)
+class ChunkedUploadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='mobile')
+        buffer = BytesIO()
+        Image.new('RGB', (40, 30)).save(buffer, 'PNG')
+        cls.image = buffer.getvalue()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def create_session(self, size=None):
+        response = self.authorized_client.post(
+            reverse('posts:upload_create'),
+            data={'name': 'photo.png', 'size': size or len(self.image)},
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def send(self, url, start, end):
+        return self.authorized_client.put(
+            url,
+            data=self.image[start:end + 1],
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{len(self.image)}',
+        )
+
+    def test_upload_in_parts_and_finalize(self):
+        """Картинка, присланная частями, становится картинкой поста."""
+        state = self.create_session()
+        middle = len(self.image) // 2
+        self.send(state['url'], 0, middle - 1)
+        # Повтор оборвавшейся части не дублирует байты.
+        self.send(state['url'], 0, middle - 1)
+        response = self.send(state['url'], middle, len(self.image) - 1)
+        self.assertEqual(response.json()['received'], len(self.image))
+
+        response = self.authorized_client.post(
+            reverse('posts:upload_finalize', args=(state['id'],)),
+            data={'text': 'Пост с докачкой'},
+        )
+        self.assertEqual(response.status_code, 201)
+        post = Post.objects.get(text='Пост с докачкой')
+        with post.image.open('rb') as image:
+            self.assertEqual(image.read(), self.image)
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_gap_in_parts_is_reported(self):
+        state = self.create_session()
+        response = self.send(state['url'], 10, 20)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['received'], 0)
+
+    def test_non_image_is_rejected_on_first_part(self):
+        state = self.create_session(size=20)
+        response = self.authorized_client.put(
+            state['url'],
+            data=b'definitely not image',
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE='bytes 0-19/20',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_finalize_requires_all_bytes(self):
+        state = self.create_session()
+        self.send(state['url'], 0, 9)
+        response = self.authorized_client.post(
+            reverse('posts:upload_finalize', args=(state['id'],)),
+            data={'text': 'Рано'},
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Post.objects.filter(text='Рано').exists())
+
+    def test_expired_sessions_are_cleaned(self):
+        state = self.create_session()
+        self.send(state['url'], 0, 9)
+        UploadSession.objects.update(
+            created=timezone.now() - datetime.timedelta(days=2)
+        )
+        call_command('clean_upload_sessions', stdout=StringIO())
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse(
+            os.path.exists(os.path.join(TEMP_UPLOADS_ROOT, state['id']))
+        )
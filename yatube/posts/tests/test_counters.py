@@ -0,0 +1,102 @@
+import time
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..counters import view_counter
+from ..models import Post
+
+User = get_user_model()
+
+
+class ViewCounterTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.id}
+        )
+
+    def views_in_db(self):
+        return Post.objects.values_list('views', flat=True).get(
+            pk=self.post.pk
+        )
+
+    @override_settings(
+        VIEW_COUNTER_FLUSH_THRESHOLD=3, VIEW_COUNTER_FLUSH_INTERVAL=3600
+    )
+    def test_views_are_written_in_batches(self):
+        """Просмотры попадают в базу только при наборе порога."""
+        for _ in range(2):
+            self.guest_client.get(self.url)
+        self.assertEqual(self.views_in_db(), 0)
+        response = self.guest_client.get(self.url)
+        self.assertEqual(self.views_in_db(), 3)
+        self.assertEqual(response.context['views_count'], 3)
+
+    @override_settings(
+        VIEW_COUNTER_FLUSH_THRESHOLD=100, VIEW_COUNTER_FLUSH_INTERVAL=3600
+    )
+    def test_pending_views_are_shown_and_flushed(self):
+        response = self.guest_client.get(self.url)
+        self.assertEqual(response.context['views_count'], 1)
+        self.assertEqual(self.views_in_db(), 0)
+        self.assertEqual(view_counter.pending(self.post.id), 1)
+        view_counter.flush(self.post.id)
+        self.assertEqual(self.views_in_db(), 1)
+        self.assertEqual(view_counter.pending(self.post.id), 0)
+
+    @override_settings(
+        VIEW_COUNTER_FLUSH_THRESHOLD=100, VIEW_COUNTER_FLUSH_INTERVAL=0
+    )
+    def test_views_are_flushed_after_interval(self):
+        """Первый просмотр запоминает время, следующий уже сбрасывает."""
+        self.guest_client.get(self.url)
+        self.assertEqual(self.views_in_db(), 0)
+        response = self.guest_client.get(self.url)
+        self.assertEqual(response.context['views_count'], 2)
+        self.assertEqual(self.views_in_db(), 2)
+
+    @override_settings(
+        VIEW_COUNTER_FLUSH_THRESHOLD=100, VIEW_COUNTER_FLUSH_INTERVAL=60
+    )
+    def test_idle_post_is_flushed_by_other_views(self):
+        """Просмотры поста, который больше не открывают, не теряются."""
+        other = Post.objects.create(author=self.user, text='Другой пост')
+        self.guest_client.get(self.url)
+        self.guest_client.get(self.url)
+        self.assertEqual(self.views_in_db(), 0)
+        with mock.patch(
+            'posts.counters.time.time', return_value=time.time() + 60
+        ):
+            self.guest_client.get(
+                reverse('posts:post_detail', kwargs={'post_id': other.id})
+            )
+        self.assertEqual(self.views_in_db(), 2)
+        self.assertEqual(
+            Post.objects.values_list('views', flat=True).get(pk=other.pk), 1
+        )
+        self.assertEqual(view_counter.pending(self.post.id), 0)
+
+    @override_settings(
+        VIEW_COUNTER_FLUSH_THRESHOLD=100, VIEW_COUNTER_FLUSH_INTERVAL=3600
+    )
+    def test_flush_views_command_writes_all_pending(self):
+        self.guest_client.get(self.url)
+        call_command('flush_views', stdout=StringIO())
+        self.assertEqual(self.views_in_db(), 1)
+        # Пост снова попадает в список со следующим просмотром.
+        self.guest_client.get(self.url)
+        call_command('flush_views', stdout=StringIO())
+        self.assertEqual(self.views_in_db(), 2)
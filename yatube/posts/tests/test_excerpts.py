@@ -0,0 +1,53 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Post, User
+from ..utils import make_excerpt
+
+LONG_TEXT = 'Длинный пост о погоде. ' * 40
+
+
+class MakeExcerptTest(TestCase):
+    def test_short_text_is_kept(self):
+        self.assertEqual(make_excerpt('Коротко.', 20), 'Коротко.')
+
+    def test_long_text_is_cut_on_word_boundary(self):
+        self.assertEqual(
+            make_excerpt('Первое второе третье', 16), 'Первое второе…'
+        )
+
+
+@override_settings(POST_EXCERPT_LENGTH=50)
+class FeedExcerptTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='writer')
+        cls.post = Post.objects.create(author=cls.user, text=LONG_TEXT)
+
+    def test_excerpt_follows_text(self):
+        """Начало текста пересчитывается при каждом сохранении поста."""
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.excerpt, make_excerpt(LONG_TEXT))
+        post.text = 'Исправленный текст'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.excerpt, 'Исправленный текст')
+
+    def test_feed_shows_excerpt_without_loading_text(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('posts:profile', args=(self.user.username,))
+            )
+        self.assertContains(response, make_excerpt(LONG_TEXT))
+        self.assertNotContains(response, LONG_TEXT.strip())
+        post_queries = [
+            query['sql'] for query in queries
+            if 'FROM "posts_post"' in query['sql']
+            and '"posts_post"."excerpt"' in query['sql']
+        ]
+        self.assertTrue(post_queries)
+        for sql in post_queries:
+            self.assertNotIn('"posts_post"."text"', sql)
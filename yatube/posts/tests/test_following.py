@@ -0,0 +1,55 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..following import followed_ids
+from ..models import Follow, User
+
+
+class FollowedIdsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username=f'author{i}') for i in range(3)
+        ]
+        Follow.objects.create(user=cls.reader, author=cls.authors[0])
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_set_is_loaded_once(self):
+        """Подписки читаются из базы один раз, дальше — из кеша."""
+        reader = User.objects.get(pk=self.reader.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(followed_ids(reader), {self.authors[0].id})
+        fresh = User.objects.get(pk=self.reader.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(followed_ids(fresh), {self.authors[0].id})
+
+    def test_follow_and_unfollow_update_set(self):
+        followed_ids(User.objects.get(pk=self.reader.pk))
+        self.client.get(
+            reverse('posts:profile_follow', args=(self.authors[1],))
+        )
+        self.client.get(
+            reverse('posts:profile_unfollow', args=(self.authors[0],))
+        )
+        fresh = User.objects.get(pk=self.reader.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(followed_ids(fresh), {self.authors[1].id})
+
+    def test_profile_button(self):
+        cases = (
+            (self.authors[0], 'Отписаться'),
+            (self.authors[2], 'Подписаться'),
+        )
+        for author, button in cases:
+            with self.subTest(author=author.username):
+                response = self.client.get(
+                    reverse('posts:profile', args=(author.username,))
+                )
+                self.assertContains(response, button)
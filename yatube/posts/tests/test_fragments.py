@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post, User
+from ..utils import feed_cursor
+
+POSTS_COUNT = settings.POSTS_PAGINATE + 3
+
+
+class FeedFragmentTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='scroller')
+        for number in range(POSTS_COUNT):
+            Post.objects.create(author=cls.author, text=f'Пост {number}')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_page_links_first_fragment(self):
+        """Страница ленты знает, с какого курсора продолжать."""
+        response = self.client.get(reverse('posts:index'))
+        last = response.context['page_obj'][settings.POSTS_PAGINATE - 1]
+        self.assertContains(
+            response,
+            f'{reverse("posts:index_fragment")}?cursor={feed_cursor(last)}',
+        )
+
+    def test_fragments_cover_feed_without_gaps(self):
+        """Фрагменты по цепочке X-Next-Page отдают всю ленту без base.html."""
+        url = reverse('posts:profile_fragment', args=(self.author.username,))
+        texts = []
+        while url:
+            response = self.client.get(url)
+            self.assertNotContains(response, '<html')
+            content = response.content.decode()
+            texts.extend(
+                text for text in (f'Пост {n}' for n in range(POSTS_COUNT))
+                if f'<p>{text}</p>' in content
+            )
+            url = response.get('X-Next-Page')
+        self.assertEqual(len(texts), POSTS_COUNT)
+        self.assertEqual(len(set(texts)), POSTS_COUNT)
+
+    def test_fragment_is_cacheable(self):
+        response = self.client.get(reverse('posts:index_fragment'))
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn(
+            f'max-age={settings.FEED_FRAGMENT_MAX_AGE}',
+            response['Cache-Control'],
+        )
+        repeated = self.client.get(
+            reverse('posts:index_fragment'),
+            HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        self.assertEqual(repeated.status_code, 304)
+
+    def test_new_post_changes_etag(self):
+        etag = self.client.get(reverse('posts:index_fragment'))['ETag']
+        Post.objects.create(author=self.author, text='Свежий пост')
+        response = self.client.get(
+            reverse('posts:index_fragment'), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_broken_cursor_is_rejected(self):
+        response = self.client.get(
+            reverse('posts:index_fragment'), {'cursor': 'oops'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_oversized_cursor_is_rejected(self):
+        """Числа курсора вне 64-битного целого — тоже испорченный курсор."""
+        for cursor in (f'{10 ** 23}_1', f'0_{10 ** 23}', f'1_-{10 ** 23}'):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(
+                    reverse('posts:index_fragment'), {'cursor': cursor}
+                )
+                self.assertEqual(response.status_code, 400)
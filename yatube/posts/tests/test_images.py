@@ -0,0 +1,260 @@
+import hashlib
+import os
+import shutil
+import struct
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..images import optimize, strip_metadata
+from ..models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def photo_bytes(size=(1600, 1200), image_format='JPEG', quality=95,
+                orientation=None):
+    """Шумная картинка с EXIF, как снимок с телефона."""
+    exif = Image.Exif()
+    exif[0x010F] = 'Phone'
+    if orientation:
+        exif[0x0112] = orientation
+    buffer = BytesIO()
+    Image.effect_noise(size, 40).convert('RGB').save(
+        buffer, image_format, quality=quality, exif=exif.tobytes()
+    )
+    return buffer.getvalue()
+
+
+def has_metadata(data):
+    with Image.open(BytesIO(data)) as image:
+        return bool(image.getexif()) or 'exif' in image.info
+
+
+class OptimizeTest(TestCase):
+    def test_downsizes_and_strips_exif(self):
+        data, width, height = optimize(BytesIO(photo_bytes()), 800, 80)
+        self.assertEqual((width, height), (800, 600))
+        with Image.open(BytesIO(data)) as image:
+            self.assertEqual(image.size, (800, 600))
+            self.assertNotIn('exif', image.info)
+
+    def test_gif_is_left_as_is(self):
+        buffer = BytesIO()
+        Image.new('RGB', (1600, 1200)).save(buffer, 'GIF')
+        buffer.seek(0)
+        self.assertIsNone(optimize(buffer, 800, 80))
+
+
+class StripMetadataTest(TestCase):
+    def test_jpeg_keeps_compressed_pixels(self):
+        """EXIF вырезается из JPEG, а сжатые данные остаются байт в байт."""
+        data = photo_bytes((64, 48), quality=40)
+        stripped = strip_metadata(data)
+        self.assertFalse(has_metadata(stripped))
+        scan = data.index(b'\xff\xda')
+        self.assertTrue(stripped.endswith(data[scan:]))
+
+    def test_png_loses_exif_chunk(self):
+        stripped = strip_metadata(photo_bytes((8, 8), 'PNG'))
+        self.assertFalse(has_metadata(stripped))
+        self.assertIsNone(strip_metadata(stripped))
+
+    def test_webp_loses_exif_chunk(self):
+        """Чанк EXIF вырезается, флаг в VP8X и длина RIFF исправляются."""
+        def chunk(kind, payload):
+            padding = bytes(len(payload) % 2)
+            return kind + struct.pack('<I', len(payload)) + payload + padding
+
+        header = chunk(b'VP8X', bytes([0x08]) + bytes(9))
+        pixels = chunk(b'VP8L', b'\x2f' + bytes(6))
+        body = b'WEBP' + header + chunk(b'EXIF', b'GPS') + pixels
+        data = b'RIFF' + struct.pack('<I', len(body)) + body
+        stripped = strip_metadata(data)
+        self.assertEqual(
+            stripped[12:],
+            chunk(b'VP8X', bytes(10)) + pixels
+        )
+        self.assertEqual(
+            struct.unpack('<I', stripped[4:8])[0], len(stripped) - 8
+        )
+
+    def test_gif_loses_comment(self):
+        buffer = BytesIO()
+        Image.new('P', (8, 8)).save(buffer, 'GIF', comment=b'GPS 55.75 37.61')
+        stripped = strip_metadata(buffer.getvalue())
+        self.assertNotIn(b'GPS', stripped)
+        with Image.open(BytesIO(stripped)) as image:
+            self.assertEqual(image.size, (8, 8))
+
+    def test_clean_image_is_left_alone(self):
+        buffer = BytesIO()
+        Image.new('RGB', (8, 8)).save(buffer, 'GIF')
+        self.assertIsNone(strip_metadata(buffer.getvalue()))
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_IMAGE_MAX_SIDE=800,
+    POST_IMAGE_MAX_BYTES=20 * 1024 * 1024,
+)
+class OptimizeUploadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='photographer')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_uploaded_photo_is_optimized(self):
+        """Загруженный снимок сохраняется уменьшенным и без EXIF."""
+        uploaded = SimpleUploadedFile(
+            'photo.jpg', photo_bytes(), content_type='image/jpeg'
+        )
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Снимок', 'image': uploaded},
+        )
+        post = Post.objects.get(text='Снимок')
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (800, 600))
+            self.assertNotIn('exif', image.info)
+
+    def test_small_compressed_photo_loses_exif(self):
+        """Пережимать маленький JPEG незачем, но EXIF всё равно удаляется."""
+        data = photo_bytes((400, 300), quality=40)
+        uploaded = SimpleUploadedFile(
+            'small.jpg', data, content_type='image/jpeg'
+        )
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Маленький', 'image': uploaded},
+        )
+        post = Post.objects.get(text='Маленький')
+        with open(post.image.path, 'rb') as file:
+            saved = file.read()
+        self.assertFalse(has_metadata(saved))
+        self.assertEqual(saved, strip_metadata(data))
+
+    def test_rotated_photo_is_turned_before_exif_is_dropped(self):
+        uploaded = SimpleUploadedFile(
+            'rotated.jpg', photo_bytes((400, 300), quality=40, orientation=6),
+            content_type='image/jpeg',
+        )
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Повёрнутый', 'image': uploaded},
+        )
+        post = Post.objects.get(text='Повёрнутый')
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (300, 400))
+            self.assertFalse(image.getexif())
+
+    @override_settings(POST_IMAGE_OPTIMIZE=False)
+    def test_optimization_can_be_disabled(self):
+        uploaded = SimpleUploadedFile(
+            'raw.jpg', photo_bytes(), content_type='image/jpeg'
+        )
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Как есть', 'image': uploaded},
+        )
+        post = Post.objects.get(text='Как есть')
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (1600, 1200))
+            self.assertFalse(image.getexif())
+
+    def test_optimize_media_rewrites_existing_images(self):
+        path = os.path.join(TEMP_MEDIA_ROOT, 'posts', 'old.jpg')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(photo_bytes())
+        Post.objects.create(
+            author=self.user, text='Старый пост', image='posts/old.jpg'
+        )
+        out = StringIO()
+        call_command('optimize_media', workers=2, stdout=out)
+        self.assertIn('Пережато картинок: 1 из 1', out.getvalue())
+        with Image.open(path) as image:
+            self.assertEqual(image.size, (800, 600))
+        post = Post.objects.get(text='Старый пост')
+        with open(path, 'rb') as file:
+            data = file.read()
+        self.assertEqual((post.image_width, post.image_height), (800, 600))
+        self.assertEqual(post.image_size, len(data))
+        self.assertEqual(post.image_hash, hashlib.sha256(data).hexdigest())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_IMAGE_MAX_SIDE=800)
+class ImageMetadataTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='surveyor')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def assertMetadataMatchesFile(self, post, size):
+        with open(post.image.path, 'rb') as file:
+            data = file.read()
+        self.assertEqual((post.image_width, post.image_height), size)
+        self.assertEqual(post.image_size, len(data))
+        self.assertEqual(post.image_hash, hashlib.sha256(data).hexdigest())
+
+    def test_metadata_is_saved_with_upload(self):
+        """Размеры, вес и хеш картинки сохраняются вместе с постом."""
+        uploaded = SimpleUploadedFile(
+            'photo.jpg', photo_bytes(), content_type='image/jpeg'
+        )
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'С размерами', 'image': uploaded},
+        )
+        post = Post.objects.get(text='С размерами')
+        self.assertMetadataMatchesFile(post, (800, 600))
+
+    def test_card_has_intrinsic_size(self):
+        uploaded = SimpleUploadedFile(
+            'photo.jpg', photo_bytes(), content_type='image/jpeg'
+        )
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Карточка', 'image': uploaded},
+        )
+        response = self.authorized_client.get(
+            reverse('posts:profile', args=(self.user.username,))
+        )
+        self.assertContains(response, 'width="960" height="339"')
+
+    def test_backfill_images_fills_old_posts(self):
+        path = os.path.join(TEMP_MEDIA_ROOT, 'posts', 'legacy.jpg')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(photo_bytes((640, 480)))
+        post = Post.objects.create(
+            author=self.user, text='Без размеров', image='posts/legacy.jpg'
+        )
+        out = StringIO()
+        call_command('backfill_images', workers=2, stdout=out)
+        self.assertIn('Заполнено постов: 1', out.getvalue())
+        post.refresh_from_db()
+        self.assertMetadataMatchesFile(post, (640, 480))
@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+
+from ..models import Comment, Follow, Post
+
+User = get_user_model()
+
+
+def explain(queryset):
+    """Возвращает план запроса SQLite одной строкой.
+
+    Слово TABLE убирается, так как его пишут только старые версии SQLite.
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return ' | '.join(
+            row[-1].replace('TABLE ', '') for row in cursor.fetchall()
+        )
+
+
+class QueryPlanTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='follower')
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        Follow.objects.create(user=cls.user, author=cls.author)
+        Comment.objects.create(
+            post=cls.post, author=cls.user, text='Комментарий'
+        )
+
+    def test_profile_follow_check_uses_unique_index(self):
+        """Проверка подписки в profile идёт по индексу (user, author)."""
+        plan = explain(
+            Follow.objects.filter(user=self.user, author=self.author)
+        )
+        self.assertIn('INDEX', plan)
+        self.assertIn('(user_id=? AND author_id=?)', plan)
+
+    def test_follow_index_join_uses_unique_index(self):
+        """Лента подписок ищет подписки по индексу, а не сканирует их."""
+        plan = explain(
+            Post.objects.filter(author__following__user=self.user)
+        )
+        self.assertIn('SEARCH posts_follow USING COVERING INDEX', plan)
+        self.assertNotIn('SCAN', plan)
+
+    def test_post_comments_use_post_created_index(self):
+        """Комментарии поста выбираются по индексу (post, created)."""
+        plan = explain(self.post.comments.all())
+        self.assertIn('comment_post_created_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_duplicate_follow_is_rejected(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=self.user, author=self.author)
+
+    def test_self_follow_is_rejected(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=self.user, author=self.user)
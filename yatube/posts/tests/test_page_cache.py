@@ -0,0 +1,54 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+
+class SharedPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='Общий пост', author=self.author, group=self.group
+        )
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_feed_is_shared_and_header_is_personal(self):
+        """Лента из кеша общая, а шапка у каждого своя."""
+        self.author_client.get(reverse('posts:index'))
+        Post.objects.filter(pk=self.post.pk).delete()
+        content = self.reader_client.get(reverse('posts:index')).content
+        self.assertIn('Общий пост', content.decode())
+        self.assertIn('/profile/reader/', content.decode())
+        self.assertNotIn('/profile/author/', content.decode())
+
+    def test_cached_feed_costs_no_queries_for_anonymous(self):
+        client = Client()
+        client.get(reverse('posts:index'))
+        with self.assertNumQueries(0):
+            client.get(reverse('posts:index'))
+
+    def test_new_post_appears_in_profile_and_group_at_once(self):
+        urls = (
+            reverse('posts:profile', args=(self.author.username,)),
+            reverse('posts:group_posts', args=(self.group.slug,)),
+        )
+        for url in urls:
+            self.reader_client.get(url)
+        Post.objects.create(
+            text='Свежий пост', author=self.author, group=self.group
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.reader_client.get(url)
+                self.assertIn('Свежий пост', response.content.decode())
@@ -0,0 +1,82 @@
+from datetime import datetime, timezone
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post, User
+from ..trending import trending_posts
+from ..utils import CachedCountPaginator, posts_generation
+
+
+class CachedCountPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='writer')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.author) for i in range(30)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_elided_page_range(self):
+        paginator = CachedCountPaginator(range(1000), 10)
+        ellipsis = CachedCountPaginator.ELLIPSIS
+        cases = (
+            (1, [1, 2, 3, ellipsis, 100]),
+            (50, [1, ellipsis, 48, 49, 50, 51, 52, ellipsis, 100]),
+            (100, [1, ellipsis, 98, 99, 100]),
+        )
+        for number, expected in cases:
+            with self.subTest(number=number):
+                self.assertEqual(
+                    list(paginator.get_elided_page_range(number)), expected
+                )
+
+    def test_count_is_cached_until_post_write(self):
+        """COUNT(*) выполняется один раз до записи в Post."""
+        posts = Post.objects.all()
+        with self.assertNumQueries(1):
+            self.assertEqual(CachedCountPaginator(posts, 10).count, 30)
+        with self.assertNumQueries(0):
+            self.assertEqual(CachedCountPaginator(posts, 10).count, 30)
+        Post.objects.create(text='Новый пост', author=self.author)
+        with self.assertNumQueries(1):
+            self.assertEqual(CachedCountPaginator(posts, 10).count, 31)
+
+    def test_trending_count_key_is_stable(self):
+        """Порог рейтинга не меняет SQL между запросами одной минуты."""
+        queries = []
+        for second in (10, 50):
+            moment = datetime(2026, 1, 1, 12, 0, second, tzinfo=timezone.utc)
+            with mock.patch('django.utils.timezone.now', return_value=moment):
+                queries.append(trending_posts().query.sql_with_params())
+        self.assertEqual(queries[0], queries[1])
+
+    def test_follow_recounts_only_own_feed(self):
+        reader = User.objects.create_user(username='reader')
+        client = Client()
+        client.force_login(reader)
+        client.get(reverse('posts:follow_index'))
+        generation = posts_generation()
+        client.get(
+            reverse('posts:profile_follow', args=(self.author.username,))
+        )
+        self.assertEqual(posts_generation(), generation)
+        response = client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['page_obj'].paginator.count, 30)
+        client.get(
+            reverse('posts:profile_unfollow', args=(self.author.username,))
+        )
+        response = client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['page_obj'].paginator.count, 0)
+
+    @override_settings(POSTS_PAGINATE=1)
+    def test_widget_size_does_not_grow_with_feed(self):
+        response = Client().get(reverse('posts:index') + '?page=15')
+        content = response.content.decode()
+        self.assertEqual(content.count('class="page-link"'), 13)
+        self.assertIn(CachedCountPaginator.ELLIPSIS, content)
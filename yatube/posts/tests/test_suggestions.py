@@ -0,0 +1,101 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Follow, FollowSuggestion, StaleSuggestions
+from ..suggestions import FollowGraph, refresh
+
+User = get_user_model()
+
+
+class FollowSuggestionTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.friend = User.objects.create_user(username='friend')
+        cls.other_friend = User.objects.create_user(username='other_friend')
+        cls.popular = User.objects.create_user(username='popular')
+        cls.niche = User.objects.create_user(username='niche')
+        Follow.objects.bulk_create([
+            Follow(user=cls.user, author=cls.friend),
+            Follow(user=cls.user, author=cls.other_friend),
+            Follow(user=cls.friend, author=cls.popular),
+            Follow(user=cls.other_friend, author=cls.popular),
+            Follow(user=cls.other_friend, author=cls.niche),
+            Follow(user=cls.other_friend, author=cls.user),
+            Follow(user=cls.friend, author=cls.other_friend),
+        ])
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def refresh(self, *args):
+        call_command('refresh_suggestions', *args, stdout=StringIO())
+
+    def test_graph_suggests_by_overlap(self):
+        """Рекомендации упорядочены по числу общих подписок."""
+        graph = FollowGraph.load()
+        self.assertEqual(
+            graph.suggest(self.user.id, limit=5),
+            [(self.popular.id, 2), (self.niche.id, 1)]
+        )
+        self.assertEqual(graph.suggest(self.popular.id, limit=5), [])
+
+    def test_suggestions_shown_on_follow_index(self):
+        self.refresh('--all')
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [item.author for item in response.context['suggestions']],
+            [self.popular, self.niche]
+        )
+
+    def test_follow_marks_user_stale_and_refresh_updates_only_them(self):
+        self.refresh('--all')
+        self.authorized_client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'popular'})
+        )
+        self.assertTrue(
+            StaleSuggestions.objects.filter(user=self.user).exists()
+        )
+        self.assertFalse(
+            FollowSuggestion.objects.filter(
+                user=self.user, author=self.popular
+            ).exists()
+        )
+        friend_suggestions = list(
+            FollowSuggestion.objects.filter(user=self.friend)
+        )
+
+        self.refresh()
+
+        self.assertFalse(StaleSuggestions.objects.exists())
+        self.assertEqual(
+            list(
+                FollowSuggestion.objects.filter(user=self.user)
+                .values_list('author__username', flat=True)
+            ),
+            ['niche']
+        )
+        self.assertEqual(
+            list(FollowSuggestion.objects.filter(user=self.friend)),
+            friend_suggestions
+        )
+
+    def test_mark_made_during_refresh_survives(self):
+        """Пометка новее начала расчёта снимается только следующим."""
+        StaleSuggestions.objects.create(user=self.user)
+        StaleSuggestions.objects.update(
+            marked=timezone.now() + timedelta(minutes=1)
+        )
+        self.assertEqual(refresh(limit=5), 0)
+        self.assertTrue(
+            StaleSuggestions.objects.filter(user=self.user).exists()
+        )
+        self.assertFalse(FollowSuggestion.objects.exists())
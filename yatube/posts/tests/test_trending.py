@@ -0,0 +1,113 @@
+import datetime
+import math
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Post, TrendingPost
+from ..trending import log_add
+
+User = get_user_model()
+
+
+class TrendingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.older_post = Post.objects.create(
+            author=cls.user, text='Старый пост'
+        )
+        cls.newer_post = Post.objects.create(
+            author=cls.user, text='Новый пост'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_log_add(self):
+        self.assertAlmostEqual(log_add(0.0, 0.0), math.log(2))
+        self.assertAlmostEqual(log_add(1000.0, 0.0), 1000.0)
+
+    def test_comments_raise_post_in_trending(self):
+        """Комментарии поднимают пост на странице «Популярное»."""
+        call_command('rebuild_trending', stdout=StringIO())
+        for _ in range(3):
+            self.authorized_client.post(
+                reverse(
+                    'posts:add_comment',
+                    kwargs={'post_id': self.older_post.id}
+                ),
+                data={'text': 'Комментарий'},
+            )
+        response = self.authorized_client.get(reverse('posts:trending'))
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [self.older_post, self.newer_post]
+        )
+
+    def test_rebuild_matches_incremental_scores(self):
+        """Пересчёт командой совпадает с накопленным рейтингом."""
+        call_command('rebuild_trending', stdout=StringIO())
+        for _ in range(2):
+            self.authorized_client.post(
+                reverse(
+                    'posts:add_comment',
+                    kwargs={'post_id': self.newer_post.id}
+                ),
+                data={'text': 'Комментарий'},
+            )
+        incremental = TrendingPost.objects.get(post=self.newer_post).score
+        call_command('rebuild_trending', batch_size=1, stdout=StringIO())
+        rebuilt = TrendingPost.objects.get(post=self.newer_post).score
+        self.assertAlmostEqual(incremental, rebuilt)
+
+    def test_revived_post_scores_match_rebuild(self):
+        """Давний пост с новым комментарием: оба пути дают одно и то же."""
+        old_post = Post.objects.create(author=self.user, text='Давний пост')
+        Post.objects.filter(pk=old_post.pk).update(
+            pub_date=timezone.now() - datetime.timedelta(days=30)
+        )
+        old_comment = Comment.objects.create(
+            post=old_post, author=self.user, text='Давний комментарий'
+        )
+        Comment.objects.filter(pk=old_comment.pk).update(
+            created=timezone.now() - datetime.timedelta(days=20)
+        )
+        call_command('rebuild_trending', stdout=StringIO())
+        self.assertFalse(TrendingPost.objects.filter(post=old_post).exists())
+        for _ in range(2):
+            self.authorized_client.post(
+                reverse('posts:add_comment', args=(old_post.id,)),
+                data={'text': 'Свежий комментарий'},
+            )
+        incremental = TrendingPost.objects.get(post=old_post).score
+        call_command('rebuild_trending', stdout=StringIO())
+        rebuilt = TrendingPost.objects.get(post=old_post).score
+        self.assertAlmostEqual(incremental, rebuilt)
+
+    def test_rebuild_drops_posts_outside_window(self):
+        old_post = Post.objects.create(author=self.user, text='Давний пост')
+        Post.objects.filter(pk=old_post.pk).update(
+            pub_date=timezone.now() - datetime.timedelta(days=30)
+        )
+        TrendingPost.objects.create(post=old_post, score=0)
+        call_command('rebuild_trending', stdout=StringIO())
+        self.assertFalse(
+            TrendingPost.objects.filter(post=old_post).exists()
+        )
+        self.assertEqual(TrendingPost.objects.count(), 2)
+
+    def test_new_post_enters_trending(self):
+        self.authorized_client.post(
+            reverse('posts:post_create'), data={'text': 'Свежий пост'}
+        )
+        post = Post.objects.get(text='Свежий пост')
+        self.assertTrue(TrendingPost.objects.filter(post=post).exists())
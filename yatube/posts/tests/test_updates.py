@@ -0,0 +1,101 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Follow, Post
+
+User = get_user_model()
+
+
+class UpdatesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.comments_url = reverse(
+            'posts:comment_updates', kwargs={'post_id': self.post.id}
+        )
+
+    def test_comment_updates_return_comments_after_id(self):
+        old = Comment.objects.create(
+            post=self.post, author=self.user, text='Старый'
+        )
+        new = Comment.objects.create(
+            post=self.post, author=self.user, text='Новый'
+        )
+        response = self.client.get(self.comments_url, {'after': old.id})
+        data = response.json()
+        self.assertEqual(
+            [item['text'] for item in data['items']], ['Новый']
+        )
+        self.assertEqual(data['last'], new.id)
+
+    def test_nothing_new_keeps_last_id(self):
+        response = self.client.get(self.comments_url, {'after': 42})
+        self.assertEqual(response.json(), {'items': [], 'last': 42})
+
+    def test_bad_after_is_rejected(self):
+        for after in ('x', 10 ** 23, -10 ** 23):
+            with self.subTest(after=after):
+                response = self.client.get(
+                    self.comments_url, {'after': after}
+                )
+                self.assertEqual(response.status_code, 400)
+                response = self.authorized_client.get(
+                    reverse('posts:follow_updates'), {'after': after}
+                )
+                self.assertEqual(response.status_code, 400)
+
+    @override_settings(UPDATES_LIMIT=1)
+    def test_updates_are_limited(self):
+        """Лишнее приходит следующим опросом, начиная с last."""
+        first = Comment.objects.create(
+            post=self.post, author=self.user, text='Первый'
+        )
+        Comment.objects.create(post=self.post, author=self.user, text='Второй')
+        data = self.client.get(self.comments_url).json()
+        self.assertEqual(data['last'], first.id)
+        data = self.client.get(self.comments_url, {'after': first.id}).json()
+        self.assertEqual(
+            [item['text'] for item in data['items']], ['Второй']
+        )
+
+    def test_follow_updates_return_posts_of_followed_authors(self):
+        stranger = User.objects.create_user(username='stranger')
+        Post.objects.create(author=stranger, text='Чужой пост')
+        Post.objects.create(author=self.author, text='Пост автора')
+        response = self.authorized_client.get(
+            reverse('posts:follow_updates'), {'after': self.post.id}
+        )
+        self.assertEqual(
+            [item['author'] for item in response.json()['items']],
+            ['author']
+        )
+
+    def test_pages_start_polling_from_shown_objects(self):
+        """Страница передаёт скрипту id последнего показанного объекта."""
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий'
+        )
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        )
+        self.assertEqual(response.context['last_comment_id'], comment.id)
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['last_post_id'], self.post.id)
+
+    @override_settings(POSTS_PAGINATE=1)
+    def test_follow_polling_starts_from_newest_post_on_any_page(self):
+        newest = Post.objects.create(author=self.author, text='Новый пост')
+        response = self.authorized_client.get(
+            reverse('posts:follow_index'), {'page': 2}
+        )
+        self.assertEqual(response.context['page_obj'][0], self.post)
+        self.assertEqual(response.context['last_post_id'], newest.id)
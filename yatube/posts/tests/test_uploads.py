@@ -0,0 +1,125 @@
+import hashlib
+import shutil
+import struct
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image, features
+
+from ..models import Post, User
+from ..uploadhandlers import ImageInspector, UploadRejected
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def image_bytes(image_format, size=(3, 2)):
+    buffer = BytesIO()
+    Image.new('RGB', size).save(buffer, image_format)
+    return buffer.getvalue()
+
+
+def png_header(width, height):
+    """Начало PNG с заявленными размерами, но без пикселей."""
+    return (
+        b'\x89PNG\r\n\x1a\n' + struct.pack('>I', 13) + b'IHDR'
+        + struct.pack('>II', width, height) + b'\x08\x02\x00\x00\x00'
+    )
+
+
+class ImageInspectorTest(TestCase):
+    def feed(self, data, chunk_size=7):
+        inspector = ImageInspector()
+        for start in range(0, len(data), chunk_size):
+            inspector.feed(data[start:start + chunk_size])
+        return inspector
+
+    def test_reads_declared_size_from_first_chunks(self):
+        formats = ['JPEG', 'PNG', 'GIF']
+        if features.check('webp'):
+            formats.append('WEBP')
+        for image_format in formats:
+            with self.subTest(image_format=image_format):
+                inspector = self.feed(image_bytes(image_format))
+                self.assertEqual((inspector.width, inspector.height), (3, 2))
+
+    def test_rejects_decompression_bomb_by_header(self):
+        inspector = ImageInspector()
+        with self.assertRaises(UploadRejected):
+            inspector.feed(png_header(100000, 100000))
+
+    def test_rejects_non_image(self):
+        with self.assertRaises(UploadRejected):
+            self.feed(b'<?php echo "not an image"; ?>')
+
+    @override_settings(POST_IMAGE_MAX_BYTES=10)
+    def test_rejects_oversized_file(self):
+        with self.assertRaises(UploadRejected):
+            self.feed(image_bytes('PNG'))
+
+    def test_hashes_content(self):
+        data = image_bytes('PNG')
+        inspector = self.feed(data)
+        self.assertEqual(
+            inspector.content_hash, hashlib.sha256(data).hexdigest()
+        )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageUploadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='uploader')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_bomb_upload_is_rejected_with_form_error(self):
+        """Картинка с огромными размерами отклоняется с ошибкой формы."""
+        uploaded = SimpleUploadedFile(
+            'bomb.png', png_header(100000, 100000) + b'\x00' * 1024,
+            content_type='image/png'
+        )
+        response = self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Бомба', 'image': uploaded},
+        )
+        self.assertFalse(Post.objects.filter(text='Бомба').exists())
+        self.assertIn('image', response.context['form'].errors)
+        self.assertIn(
+            'слишком большая', response.context['form'].errors['image'][0]
+        )
+
+    def test_valid_upload_is_saved(self):
+        uploaded = SimpleUploadedFile(
+            'small.png', image_bytes('PNG'), content_type='image/png'
+        )
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Картинка', 'image': uploaded},
+        )
+        self.assertTrue(
+            Post.objects.filter(
+                text='Картинка', image='posts/small.png'
+            ).exists()
+        )
+
+    def test_csrf_is_still_checked(self):
+        """Подмена обработчиков загрузки не отключает проверку CSRF."""
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = client.post(
+            reverse('posts:post_create'), data={'text': 'Без токена'}
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Post.objects.filter(text='Без токена').exists())
@@ -0,0 +1,126 @@
+"""Рейтинг «популярно сейчас».
+
+Каждое событие (публикация поста или комментарий к нему) весит
+2 ** ((t - EPOCH) / TRENDING_HALF_LIFE). Сумма весов, делённая на вес
+текущего момента, — это активность поста с экспоненциальным затуханием.
+Делитель общий для всех постов, поэтому для сортировки достаточно суммы,
+а хранится её логарифм, чтобы не переполнять float.
+"""
+import datetime
+import math
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Comment, Post, TrendingPost
+
+EPOCH = datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def event_weight(moment):
+    """Логарифм веса события, случившегося в момент moment."""
+    elapsed = (moment - EPOCH).total_seconds()
+    return math.log(2) * elapsed / settings.TRENDING_HALF_LIFE
+
+
+def log_add(first, second):
+    """Возвращает log(exp(first) + exp(second)) без переполнения."""
+    high, low = max(first, second), min(first, second)
+    return high + math.log1p(math.exp(low - high))
+
+
+def log_sum(weights):
+    """Возвращает log(sum(exp(w) for w in weights)) без переполнения."""
+    high = max(weights)
+    return high + math.log(math.fsum(math.exp(w - high) for w in weights))
+
+
+def window_start():
+    return timezone.now() - datetime.timedelta(
+        seconds=settings.TRENDING_WINDOW
+    )
+
+
+def trending_posts():
+    """Посты с заметной активностью в окне, самые популярные первыми.
+
+    Порог округляется до минуты: иначе он менялся бы на каждом запросе,
+    и CachedCountPaginator писал бы в кеш новый ключ при каждом показе.
+    """
+    cutoff = window_start().replace(second=0, microsecond=0)
+    return Post.objects.filter(
+        trending__score__gte=event_weight(cutoff)
+    ).order_by('-trending__score')
+
+
+def post_weights(post_ids):
+    """Логарифмы весов всех событий постов: публикации и комментариев.
+
+    Один и тот же набор событий считают и rebuild(), и record_activity()
+    для поста, у которого ещё нет рейтинга, поэтому оба пути дают один
+    и тот же результат. Окно TRENDING_WINDOW отбирает только посты, но
+    не события: старые события и так весят пренебрежимо мало.
+    """
+    weights = {
+        post_id: [event_weight(pub_date)]
+        for post_id, pub_date in Post.objects.filter(
+            id__in=post_ids
+        ).values_list('id', 'pub_date')
+    }
+    comments = Comment.objects.filter(
+        post_id__in=post_ids
+    ).values_list('post_id', 'created')
+    for post_id, created in comments.iterator():
+        weights[post_id].append(event_weight(created))
+    return weights
+
+
+def record_activity(post, moment):
+    """Добавляет к рейтингу поста событие в момент moment.
+
+    Событие к этому времени уже сохранено. Если рейтинга у поста нет
+    (новый пост или давний, выпавший из окна), он считается по всем
+    событиям поста, как в rebuild().
+    """
+    with transaction.atomic():
+        trending = TrendingPost.objects.select_for_update().filter(
+            post=post
+        ).first()
+        if trending is None:
+            score = log_sum(post_weights([post.id])[post.id])
+            trending, created = TrendingPost.objects.get_or_create(
+                post=post, defaults={'score': score}
+            )
+            if created:
+                return
+        trending.score = log_add(trending.score, event_weight(moment))
+        trending.save(update_fields=('score',))
+
+
+def rebuild(batch_size):
+    """Пересчитывает рейтинг всех постов с активностью в окне.
+
+    Посты обрабатываются пачками по batch_size: для каждой пачки одним
+    запросом читаются даты комментариев, и рейтинг пачки перезаписывается
+    в отдельной транзакции. Возвращает число пересчитанных постов.
+    """
+    since = window_start()
+    candidates = Post.objects.filter(
+        Q(pub_date__gte=since) | Q(comments__created__gte=since)
+    ).values('id').distinct()
+    post_ids = list(candidates.values_list('id', flat=True))
+
+    for start in range(0, len(post_ids), batch_size):
+        batch = post_ids[start:start + batch_size]
+        weights = post_weights(batch)
+        with transaction.atomic():
+            TrendingPost.objects.filter(post_id__in=batch).delete()
+            TrendingPost.objects.bulk_create(
+                TrendingPost(post_id=post_id, score=log_sum(post_weights))
+                for post_id, post_weights in weights.items()
+            )
+
+    TrendingPost.objects.exclude(post_id__in=candidates).delete()
+    return len(post_ids)
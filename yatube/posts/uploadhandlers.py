@@ -0,0 +1,221 @@
+"""Проверка картинок прямо во время загрузки.
+
+Формат и заявленные размеры картинки записаны в первых байтах файла,
+поэтому слишком большие файлы, «декомпрессионные бомбы» и не-картинки
+отклоняются по первым чанкам, до того как Pillow откроет файл целиком.
+Обработчик подключается только к формам постов декоратором
+inspect_image_uploads; остальные загрузки идут через обработчики Django.
+"""
+import hashlib
+import struct
+from functools import wraps
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+
+# Сколько байт начала файла держать в памяти в поисках размеров.
+# У JPEG перед размерами может идти EXIF до 64 КБ и больше.
+HEADER_LIMIT = 256 * 1024
+
+SIGNATURES = (
+    (b'\xff\xd8\xff', 'jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+    (b'RIFF', 'webp'),
+)
+
+# Маркеры JPEG без поля длины.
+JPEG_STANDALONE = {0x01, 0xD8} | set(range(0xD0, 0xD8))
+# Маркеры начала кадра, в которых записаны размеры.
+JPEG_FRAMES = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+class UploadRejected(Exception):
+    pass
+
+
+def png_size(header):
+    if len(header) >= 24:
+        return struct.unpack('>II', header[16:24])
+    return None
+
+
+def gif_size(header):
+    if len(header) >= 10:
+        return struct.unpack('<HH', header[6:10])
+    return None
+
+
+def webp_size(header):
+    if len(header) < 30:
+        return None
+    if header[8:12] != b'WEBP':
+        raise UploadRejected('Файл не является картинкой.')
+    chunk = header[12:16]
+    if chunk == b'VP8X':
+        width = int.from_bytes(header[24:27], 'little') + 1
+        height = int.from_bytes(header[27:30], 'little') + 1
+        return width, height
+    if chunk == b'VP8L':
+        bits = int.from_bytes(header[21:25], 'little')
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8 ':
+        width, height = struct.unpack('<HH', header[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    raise UploadRejected('Файл не является картинкой.')
+
+
+def jpeg_size(header):
+    position = 2
+    while position + 4 <= len(header):
+        if header[position] != 0xFF:
+            raise UploadRejected('Повреждённый файл JPEG.')
+        marker = header[position + 1]
+        if marker == 0xFF:
+            position += 1
+            continue
+        if marker in JPEG_STANDALONE:
+            position += 2
+            continue
+        if marker in JPEG_FRAMES:
+            if position + 9 > len(header):
+                return None
+            height, width = struct.unpack(
+                '>HH', header[position + 5:position + 9]
+            )
+            return width, height
+        length = struct.unpack('>H', header[position + 2:position + 4])[0]
+        position += 2 + length
+    return None
+
+
+SIZE_READERS = {
+    'jpeg': jpeg_size,
+    'png': png_size,
+    'gif': gif_size,
+    'webp': webp_size,
+}
+
+
+class ImageInspector:
+    """Проверяет картинку по мере поступления чанков.
+
+    feed() бросает UploadRejected, как только файл превысил лимит байт,
+    оказался не картинкой или заявил больше пикселей, чем разрешено.
+    Заодно считается SHA-256 содержимого.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self.format = None
+        self.width = None
+        self.height = None
+        self._hash = hashlib.sha256()
+        self._header = b''
+        self._inspecting = True
+
+    @property
+    def content_hash(self):
+        return self._hash.hexdigest()
+
+    def feed(self, chunk):
+        self.size += len(chunk)
+        if self.size > settings.POST_IMAGE_MAX_BYTES:
+            limit = settings.POST_IMAGE_MAX_BYTES // (1024 * 1024)
+            raise UploadRejected(f'Картинка больше {limit} МБ.')
+        self._hash.update(chunk)
+        if self._inspecting:
+            self._header += chunk[:HEADER_LIMIT - len(self._header)]
+            self._inspect()
+
+    def _inspect(self):
+        if self.format is None:
+            for signature, image_format in SIGNATURES:
+                if self._header.startswith(signature):
+                    self.format = image_format
+                    break
+            else:
+                if len(self._header) >= 12:
+                    raise UploadRejected('Файл не является картинкой.')
+                return
+        size = SIZE_READERS[self.format](self._header)
+        if size is None:
+            # Размеры не нашлись в пределах HEADER_LIMIT: дальше файл
+            # проверит Pillow при валидации формы.
+            if len(self._header) >= HEADER_LIMIT:
+                self._inspecting = False
+                self._header = b''
+            return
+        self._inspecting = False
+        self._header = b''
+        self.width, self.height = size
+        if self.width * self.height > settings.POST_IMAGE_MAX_PIXELS:
+            raise UploadRejected(
+                f'Картинка {self.width}×{self.height} слишком большая.'
+            )
+
+
+class RejectedUpload(UploadedFile):
+    """Пустой файл на месте отклонённой картинки; причина — в rejection."""
+
+    def __init__(self, name, content_type, rejection):
+        super().__init__(BytesIO(), name, content_type, 0)
+        self.rejection = rejection
+
+
+class ImageUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загрузку во временный файл, проверяя её ImageInspector.
+
+    После отказа остальные чанки отбрасываются без записи и хеширования,
+    а в request.FILES попадает RejectedUpload, ошибку из которого
+    показывает PostForm.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.inspector = ImageInspector()
+        self.rejection = None
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.rejection is None:
+            try:
+                self.inspector.feed(raw_data)
+            except UploadRejected as error:
+                self.rejection = str(error)
+                self.file.close()
+            else:
+                return super().receive_data_chunk(raw_data, start)
+        return None
+
+    def file_complete(self, file_size):
+        if self.rejection is not None:
+            return RejectedUpload(
+                self.file_name, self.content_type, self.rejection
+            )
+        file = super().file_complete(file_size)
+        file.content_hash = self.inspector.content_hash
+        file.image_width = self.inspector.width
+        file.image_height = self.inspector.height
+        return file
+
+
+def inspect_image_uploads(view):
+    """Ставит ImageUploadHandler первым обработчиком загрузок view.
+
+    Обработчики можно менять, только пока тело запроса не прочитано, а
+    CsrfViewMiddleware читает request.POST до вызова view. Поэтому
+    проверка CSRF переносится внутрь, после подмены обработчиков.
+    """
+    protected = csrf_protect(view)
+
+    @csrf_exempt
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers.insert(0, ImageUploadHandler(request))
+        return protected(request, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,101 @@
+"""Загрузка картинок по частям с докачкой.
+
+Клиент создаёт UploadSession, присылает байты запросами PUT с заголовком
+Content-Range и завершает загрузку, получая пост. Оборвавшийся запрос
+не начинает загрузку заново: клиент узнаёт received и шлёт остаток.
+"""
+import os
+import re
+
+from django.core.files.uploadedfile import UploadedFile
+
+from .uploadhandlers import ImageInspector
+
+CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+CHUNK_SIZE = 64 * 1024
+
+
+class RangeMismatch(Exception):
+    """Часть начинается дальше уже полученных байт."""
+
+
+def parse_content_range(header):
+    """Разбирает «bytes start-end/total» в (start, end, total)."""
+    match = CONTENT_RANGE.match(header)
+    if not match:
+        raise ValueError('Ожидался Content-Range: bytes start-end/total')
+    start, end, total = map(int, match.groups())
+    if start > end:
+        raise ValueError('Пустой диапазон Content-Range.')
+    return start, end, total
+
+
+def append_chunk(session, stream, start, end):
+    """Дописывает байты start..end из stream в файл загрузки.
+
+    Уже полученные байты из повторно присланной части пропускаются.
+    Первые байты файла проверяются ImageInspector, который бросит
+    UploadRejected для не-картинок и «бомб» ещё до остальных частей.
+    """
+    if start > session.received:
+        raise RangeMismatch
+    skip = session.received - start
+    remaining = end - start + 1
+    inspector = ImageInspector() if session.received == 0 else None
+    path = session.path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'r+b' if os.path.exists(path) else 'wb') as file:
+        # Байты сверх received могли остаться от оборвавшегося запроса.
+        file.truncate(session.received)
+        file.seek(session.received)
+        try:
+            while remaining > 0:
+                data = stream.read(min(CHUNK_SIZE, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                if skip:
+                    data, skip = data[skip:], max(skip - len(data), 0)
+                if inspector is not None:
+                    inspector.feed(data)
+                file.write(data)
+                session.received += len(data)
+        finally:
+            session.save(update_fields=('received',))
+
+
+class AssembledUpload(UploadedFile):
+    """Собранный файл загрузки.
+
+    Благодаря temporary_file_path() хранилище перемещает файл в MEDIA_ROOT,
+    а не копирует его.
+    """
+
+    def __init__(self, path, name, size):
+        super().__init__(open(path, 'rb'), name, None, size)
+        self.path = path
+
+    def temporary_file_path(self):
+        return self.path
+
+
+def assembled_file(session):
+    """Проверяет собранный файл целиком и отдаёт его для PostForm."""
+    inspector = ImageInspector()
+    with open(session.path(), 'rb') as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+            inspector.feed(chunk)
+    upload = AssembledUpload(session.path(), session.file_name, session.size)
+    upload.content_hash = inspector.content_hash
+    upload.image_width = inspector.width
+    upload.image_height = inspector.height
+    return upload
+
+
+def discard(session):
+    """Удаляет загрузку вместе с недокачанным файлом."""
+    try:
+        os.remove(session.path())
+    except FileNotFoundError:
+        pass
+    session.delete()
@@ -6,10 +6,29 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('fragment/', views.index_fragment, name='index_fragment'),
+    path('trending/', views.trending, name='trending'),
     path('group/<slug:slug>/', views.group_posts, name='group_posts'),
+    path(
+        'group/<slug:slug>/fragment/',
+        views.group_posts_fragment,
+        name='group_posts_fragment'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/fragment/',
+        views.profile_fragment,
+        name='profile_fragment'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
+    path('uploads/', views.upload_create, name='upload_create'),
+    path(
+        'uploads/<uuid:upload_id>/',
+        views.upload_chunk,
+        name='upload_chunk'),
+    path(
+        'uploads/<uuid:upload_id>/finalize/',
+        views.upload_finalize,
+        name='upload_finalize'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
 
     path(
@@ -17,7 +36,17 @@ urlpatterns = [
         views.add_comment,
         name='add_comment'),
 
+    path(
+        'posts/<int:post_id>/comments/new/',
+        views.comment_updates,
+        name='comment_updates'),
+
     path('follow/', views.follow_index, name='follow_index'),
+    path(
+        'follow/fragment/',
+        views.follow_index_fragment,
+        name='follow_index_fragment'),
+    path('follow/new/', views.follow_updates, name='follow_updates'),
 
     path(
         'profile/<str:username>/follow/',
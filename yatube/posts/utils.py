@@ -1,9 +1,153 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+
 from django.conf import settings
+from django.core.cache import cache
 from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+GENERATION_KEY = 'posts:generation'
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+# Числа из запроса, которые идут в SQL, должны влезать в целое столбца.
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+
+
+def parse_int64(value):
+    """int(value), но ValueError и для чисел вне 64-битного целого."""
+    number = int(value)
+    if not INT64_MIN <= number <= INT64_MAX:
+        raise ValueError(value)
+    return number
+
+
+def posts_generation():
+    """Номер поколения кеша лент: счётчиков и фрагментов страниц."""
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, 1, None)
+        generation = cache.get(GENERATION_KEY, 1)
+    return generation
+
+
+def invalidate_posts_cache():
+    """Делает устаревшими все кешированные счётчики и фрагменты сразу."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, 1, None)
+
+
+def make_excerpt(text, length=None):
+    """Начало текста для лент: не длиннее length символов, по границе слова.
+
+    Абзацы сохраняются, обрезанный текст заканчивается многоточием.
+    """
+    length = length or settings.POST_EXCERPT_LENGTH
+    text = text.strip()
+    if len(text) <= length:
+        return text
+    cut = text[:length]
+    if not text[length].isspace():
+        # Недописанное слово отбрасывается, если оно не единственное.
+        cut = cut.rsplit(None, 1)[0]
+    return cut.rstrip(' \n\r\t.,;:!?—-') + '…'
+
 
+class CachedCountPaginator(Paginator):
+    """Пагинатор для длинных лент.
 
-def paginate(request, posts_list):
-    paginator = Paginator(posts_list, settings.POSTS_PAGINATE)
+    COUNT(*) по запросу кешируется до следующей записи в Post (см.
+    posts.signals). Ленты, зависящие не только от постов, передают
+    scope — например, версию подписок читателя, — и он входит в ключ.
+    Фильтр elided_page_range выводит в виджете только окно вокруг
+    текущей страницы и края ленты.
+    """
+
+    ELLIPSIS = '…'
+    on_each_side = 2
+    on_ends = 1
+
+    def __init__(self, *args, scope='', **kwargs):
+        super().__init__(*args, **kwargs)
+        self.scope = scope
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is None:
+            return super().count
+        sql, params = query.sql_with_params()
+        digest = hashlib.md5(f'{sql}{params}'.encode()).hexdigest()
+        key = f'posts:count:{posts_generation()}:{self.scope}:{digest}'
+        count = cache.get(key)
+        if count is None:
+            count = self.object_list.count()
+            cache.set(key, count, settings.POSTS_COUNT_CACHE_TIMEOUT)
+        return count
+
+    def get_elided_page_range(self, number):
+        """Номера страниц вокруг number и по краям, с ELLIPSIS в разрывах.
+
+        Тот же алгоритм, что у Paginator.get_elided_page_range в Django 3.2.
+        """
+        on_each_side, on_ends = self.on_each_side, self.on_ends
+        if self.num_pages <= (on_each_side + on_ends) * 2:
+            yield from self.page_range
+            return
+        if number > (1 + on_each_side + on_ends) + 1:
+            yield from range(1, on_ends + 1)
+            yield self.ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < (self.num_pages - on_each_side - on_ends) - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield self.ELLIPSIS
+            yield from range(
+                self.num_pages - on_ends + 1, self.num_pages + 1
+            )
+        else:
+            yield from range(number + 1, self.num_pages + 1)
+
+
+def paginate(request, posts_list, count=None, scope=''):
+    paginator = CachedCountPaginator(
+        posts_list, settings.POSTS_PAGINATE, scope=scope
+    )
+    if count is not None:
+        # Число постов уже известно вызывающему, COUNT(*) не нужен.
+        paginator.count = count
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
+
+
+def feed_cursor(post):
+    """Курсор ленты после post: время публикации в микросекундах и id."""
+    stamp = (post.pub_date - EPOCH) // timedelta(microseconds=1)
+    return f'{stamp}_{post.id}'
+
+
+def posts_after(posts, cursor):
+    """Посты ленты, идущие после cursor, от новых к старым.
+
+    В отличие от ?page= курсор не сдвигается, когда наверху ленты
+    появляются новые посты, и не требует OFFSET. Для испорченного
+    курсора бросается ValueError.
+    """
+    posts = posts.order_by('-pub_date', '-id')
+    if not cursor:
+        return posts
+    stamp, post_id = cursor.split('_')
+    # Числа вне 64-битного целого база отвергла бы только при выполнении
+    # запроса, уже ошибкой 500.
+    stamp, post_id = parse_int64(stamp), parse_int64(post_id)
+    try:
+        pub_date = EPOCH + timedelta(microseconds=stamp)
+    except OverflowError:
+        raise ValueError(cursor)
+    return posts.filter(
+        Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=post_id)
+    )
@@ -1,18 +1,85 @@
-from django.contrib.auth import get_user_model
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.db.models import Count, Max
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.utils.datastructures import MultiValueDict
+from django.views.decorators.http import (condition, require_http_methods,
+                                          require_POST)
 
+from . import following, uploads
+from .authors import get_author
+from .counters import view_counter
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post
-from .utils import paginate
+from .models import Follow, FollowSuggestion, Group, Post, UploadSession
+from .suggestions import mark_stale
+from .trending import record_activity, trending_posts
+from .uploadhandlers import UploadRejected, inspect_image_uploads
+from .utils import (feed_cursor, paginate, parse_int64, posts_after,
+                    posts_generation)
 
-User = get_user_model()
+
+def follow_suggestions(user):
+    if not user.is_authenticated:
+        return ()
+    return FollowSuggestion.objects.filter(user=user).select_related(
+        'author'
+    )[:settings.SUGGESTIONS_LIMIT]
+
+
+def save_new_post(form, author):
+    post = form.save(commit=False)
+    post.author = author
+    post.save()
+    record_activity(post, post.pub_date)
+    return post
+
+
+def feed_etag(request, *args, **kwargs):
+    """Фрагмент меняется только вместе с поколением кеша лент."""
+    return str(posts_generation())
+
+
+def follow_feed_etag(request):
+    # Лента подписок своя у каждого, кто входил с этого браузера.
+    version = following.version(request.user)
+    return f'{posts_generation()}-{request.user.id}-{version}'
+
+
+def feed_fragment(request, posts, fragment_url, context=None, private=False):
+    """Карточки постов после ?cursor= без base.html — для подгрузки ленты.
+
+    Адрес следующего фрагмента отдаётся в заголовке X-Next-Page.
+    """
+    try:
+        posts = posts_after(posts, request.GET.get('cursor'))
+    except ValueError:
+        return HttpResponseBadRequest('Неверный cursor.')
+    posts = list(posts[:settings.POSTS_PAGINATE + 1])
+    has_next = len(posts) > settings.POSTS_PAGINATE
+    posts = posts[:settings.POSTS_PAGINATE]
+    response = HttpResponse(render_to_string(
+        'includes/post_list.html', {**(context or {}), 'posts': posts}
+    ))
+    if has_next:
+        cursor = feed_cursor(posts[-1])
+        response['X-Next-Page'] = f'{fragment_url}?cursor={cursor}'
+    if private:
+        patch_cache_control(
+            response, private=True, max_age=settings.FEED_FRAGMENT_MAX_AGE
+        )
+    else:
+        patch_cache_control(
+            response, public=True, max_age=settings.FEED_FRAGMENT_MAX_AGE
+        )
+    return response
 
 
-@cache_page(20)
 def index(request):
-    posts = Post.objects.select_related('group', 'author')
+    posts = Post.objects.select_related('group', 'author').defer('text')
     page_obj = paginate(request, posts)
     context = {
         'posts': posts,
@@ -21,59 +88,104 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+def trending(request):
+    posts = trending_posts().select_related('group', 'author').defer('text')
+    page_obj = paginate(request, posts)
+    context = {
+        'page_obj': page_obj,
+        'trending': True,
+    }
+    return render(request, 'posts/trending.html', context)
+
+
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.select_related('author')
+    posts = group.posts.select_related('author').defer('text')
     page_obj = paginate(request, posts)
     context = {
         'group': group,
         'page_obj': page_obj,
+        'feed_version': posts_generation(),
     }
     return render(request, 'posts/group_list.html', context)
 
 
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.select_related('group')
-    posts_count = author.posts.count()
-    page_obj = paginate(request, posts)
-    following = (
-        request.user.is_authenticated and Follow.objects.filter(
-            user=request.user, author__username=username
-        ).exists()
-    )
+    author = get_author(username)
+    posts = author.posts.select_related('group').defer('text')
+    page_obj = paginate(request, posts, count=author.posts_count)
     context = {
         'author': author,
-        'posts_count': posts_count,
+        'posts_count': author.posts_count,
         'page_obj': page_obj,
-        'following': following,
+        'following': author.id in following.followed_ids(request.user),
+        'suggestions': follow_suggestions(request.user),
+        'feed_version': posts_generation(),
     }
     return render(request, 'posts/profile.html', context)
 
 
+@condition(etag_func=feed_etag)
+def index_fragment(request):
+    posts = Post.objects.select_related('group', 'author').defer('text')
+    return feed_fragment(request, posts, reverse('posts:index_fragment'))
+
+
+@condition(etag_func=feed_etag)
+def group_posts_fragment(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    posts = group.posts.select_related('author').defer('text')
+    return feed_fragment(
+        request, posts, reverse('posts:group_posts_fragment', args=(slug,)),
+        {'group': group},
+    )
+
+
+@condition(etag_func=feed_etag)
+def profile_fragment(request, username):
+    author = get_author(username)
+    posts = author.posts.select_related('group').defer('text')
+    return feed_fragment(
+        request, posts, reverse('posts:profile_fragment', args=(username,))
+    )
+
+
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    posts_count = post.author.posts.count()
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group').annotate(
+            author_posts_count=Count('author__posts')
+        ),
+        pk=post_id
+    )
+    posts_count = post.author_posts_count
+    # post.views прочитан до add(): сброшенные им просмотры учтены в числе,
+    # которое add() возвращает.
+    views_count = post.views + view_counter.add(post.id)
     form = CommentForm(request.POST or None)
-    comments = post.comments.all()
+    comments = list(post.comments.select_related('author'))
     context = {
         'form': form,
         'posts': post,
         'posts_count': posts_count,
+        'views_count': views_count,
         'comments': comments,
+        # С этого id страница опрашивает comment_updates.
+        'last_comment_id': max(
+            (comment.id for comment in comments), default=0
+        ),
+        'poll_interval': settings.UPDATES_POLL_INTERVAL,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
 @login_required
+@inspect_image_uploads
 def post_create(request):
     form = PostForm(
         request.POST or None,
         files=request.FILES or None)
     if form.is_valid():
-        post = form.save(commit=False)
-        post.author = request.user
-        post.save()
+        post = save_new_post(form, request.user)
         return redirect('posts:profile', post.author.username)
     context = {
         'form': form,
@@ -82,6 +194,7 @@ def post_create(request):
 
 
 @login_required
+@inspect_image_uploads
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     author = post.author
@@ -110,30 +223,203 @@ def add_comment(request, post_id):
         comment.author = request.user
         comment.post = post
         comment.save()
+        record_activity(post, comment.created)
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    page_obj = paginate(request, post_list)
+    post_list = Post.objects.filter(
+        author__following__user=request.user
+    ).select_related('author', 'group').defer('text')
+    page_obj = paginate(
+        request, post_list, scope=following.version(request.user)
+    )
 
     context = {
         'page_obj': page_obj,
+        'suggestions': follow_suggestions(request.user),
+        # Самый новый пост всей ленты, а не страницы: иначе со второй
+        # страницы опрос вернул бы как новые посты с первой.
+        'last_post_id': post_list.aggregate(last=Max('id'))['last'] or 0,
+        'poll_interval': settings.UPDATES_POLL_INTERVAL,
     }
     return render(request, 'posts/follow.html', context)
 
 
+@login_required
+@condition(etag_func=follow_feed_etag)
+def follow_index_fragment(request):
+    posts = Post.objects.filter(
+        author__following__user=request.user
+    ).select_related('author', 'group').defer('text')
+    return feed_fragment(
+        request, posts, reverse('posts:follow_index_fragment'), private=True
+    )
+
+
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_author(username)
     if author != request.user:
         Follow.objects.get_or_create(user=request.user, author=author)
+        FollowSuggestion.objects.filter(
+            user=request.user, author=author
+        ).delete()
+        mark_stale(request.user)
+        following.update(request.user, author.id, followed=True)
     return redirect('posts:profile', username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_author(username)
     Follow.objects.filter(user=request.user, author=author).delete()
+    mark_stale(request.user)
+    # following.update сдвигает версию подписок, и счётчик ленты
+    # подписок пересчитается только у этого читателя. Сигналы на Follow
+    # не вешаем, чтобы удаление подписки оставалось одним DELETE.
+    following.update(request.user, author.id, followed=False)
     return redirect('posts:profile', username=username)
+
+
+def requested_after(request):
+    """Id из ?after=: клиент уже видел всё, что не новее него."""
+    try:
+        return parse_int64(request.GET.get('after', 0))
+    except ValueError:
+        return None
+
+
+def updates_response(items, after):
+    """Ответ на опрос: новые объекты и id, с которого спрашивать дальше.
+
+    Объектов не больше UPDATES_LIMIT; остальные придут следующим опросом.
+    """
+    last = items[-1]['id'] if items else after
+    response = JsonResponse({'items': items, 'last': last})
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def comment_updates(request, post_id):
+    post = get_object_or_404(Post, pk=post_id)
+    after = requested_after(request)
+    if after is None:
+        return HttpResponseBadRequest()
+    comments = post.comments.filter(id__gt=after).select_related(
+        'author'
+    ).order_by('id')[:settings.UPDATES_LIMIT]
+    items = [
+        {
+            'id': comment.id,
+            'author': comment.author.username,
+            'text': comment.text,
+            'created': comment.created.isoformat(),
+        }
+        for comment in comments
+    ]
+    return updates_response(items, after)
+
+
+@login_required
+def follow_updates(request):
+    after = requested_after(request)
+    if after is None:
+        return HttpResponseBadRequest()
+    posts = Post.objects.filter(
+        id__gt=after, author__following__user=request.user
+    ).select_related('author').order_by('id')[:settings.UPDATES_LIMIT]
+    items = [
+        {
+            'id': post.id,
+            'author': post.author.username,
+            'url': reverse('posts:post_detail', args=(post.id,)),
+        }
+        for post in posts
+    ]
+    return updates_response(items, after)
+
+
+def upload_state(session):
+    return {
+        'id': str(session.id),
+        'size': session.size,
+        'received': session.received,
+        'url': reverse('posts:upload_chunk', args=(session.id,)),
+    }
+
+
+@login_required
+@require_POST
+def upload_create(request):
+    try:
+        size = int(request.POST['size'])
+        file_name = request.POST['name']
+    except (KeyError, ValueError):
+        return JsonResponse(
+            {'error': 'Укажите имя файла name и размер size.'}, status=400
+        )
+    if not 0 < size <= settings.POST_IMAGE_MAX_BYTES:
+        return JsonResponse(
+            {'error': 'Недопустимый размер картинки.'}, status=400
+        )
+    session = UploadSession.objects.create(
+        user=request.user, file_name=file_name[-255:], size=size
+    )
+    return JsonResponse(upload_state(session), status=201)
+
+
+@login_required
+@require_http_methods(['GET', 'PUT'])
+def upload_chunk(request, upload_id):
+    session = get_object_or_404(
+        UploadSession, pk=upload_id, user=request.user
+    )
+    if request.method == 'PUT':
+        try:
+            start, end, total = uploads.parse_content_range(
+                request.META.get('HTTP_CONTENT_RANGE', '')
+            )
+        except ValueError as error:
+            return JsonResponse({'error': str(error)}, status=400)
+        if total != session.size or end >= session.size:
+            return JsonResponse(
+                {'error': 'Диапазон выходит за размер файла.'}, status=400
+            )
+        try:
+            uploads.append_chunk(session, request, start, end)
+        except uploads.RangeMismatch:
+            return JsonResponse(upload_state(session), status=409)
+        except UploadRejected as error:
+            uploads.discard(session)
+            return JsonResponse({'error': str(error)}, status=400)
+    return JsonResponse(upload_state(session))
+
+
+@login_required
+@require_POST
+def upload_finalize(request, upload_id):
+    session = get_object_or_404(
+        UploadSession, pk=upload_id, user=request.user
+    )
+    if session.received < session.size:
+        return JsonResponse(upload_state(session), status=409)
+    try:
+        image = uploads.assembled_file(session)
+    except UploadRejected as error:
+        uploads.discard(session)
+        return JsonResponse({'error': str(error)}, status=400)
+    with image:
+        form = PostForm(request.POST, files=MultiValueDict({'image': [image]}))
+        if not form.is_valid():
+            return JsonResponse({'errors': form.errors}, status=400)
+        post = save_new_post(form, request.user)
+    uploads.discard(session)
+    return JsonResponse(
+        {
+            'id': post.id,
+            'url': reverse('posts:post_detail', args=(post.id,)),
+        },
+        status=201
+    )
@@ -0,0 +1,8 @@
+"""Настройки проекта.
+
+base — общие для всех окружений, dev — для разработки (DEBUG и
+debug_toolbar), prod — для воркеров в продакшене. Пакет по умолчанию
+повторяет dev, чтобы DJANGO_SETTINGS_MODULE=yatube.settings работал
+как раньше.
+"""
+from .dev import *  # noqa: F401,F403
@@ -0,0 +1,196 @@
+import os
+
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+SECRET_KEY = '!+)ejvf9y4w&-u%=!t*a!%rwgr3t+8&+9&^-6yczx83i5yqy%&'
+
+DEBUG = False
+
+ALLOWED_HOSTS = [
+    'www.Djaaga.pythonanywhere.com',
+    'Djaaga.pythonanywhere.com',
+    'localhost',
+    '127.0.0.1',
+    '[::1]',
+    'testserver',
+]
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'posts.apps.PostsConfig',
+    'users.apps.UsersConfig',
+    'core.apps.CoreConfig',
+    'about',
+    'sorl.thumbnail',
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    # Сжимает то, что вернули все следующие middleware и представление.
+    'core.compression.CompressionMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'yatube.urls'
+
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [TEMPLATES_DIR],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year',
+            ],
+        },
+    },
+]
+# Разобрать все шаблоны заранее, в CoreConfig.ready().
+TEMPLATES_PRECOMPILE = False
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+    }
+}
+
+# Пользователь запроса берётся из кеша, см. core.auth. ModelBackend
+# остаётся в списке: в уже выданных сессиях записан его путь, и без него
+# все вошедшие пользователи разлогинились бы после выкладки.
+AUTHENTICATION_BACKENDS = [
+    'core.auth.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+USER_CACHE_TIMEOUT = 60 * 60
+
+# Сессии живут в кеше, в django_session они пишутся не чаще раза в
+# SESSION_PERSIST_INTERVAL секунд (0 — при каждом изменении), см.
+# core.sessions. clearsessions удаляет истёкшие пачками.
+SESSION_ENGINE = 'core.sessions'
+SESSION_PERSIST_INTERVAL = 5 * 60
+SESSION_CLEANUP_BATCH_SIZE = 1000
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+# LocMemCache свой у каждого процесса: годится для runserver и тестов.
+# В бою сессии, пользователь запроса и счётчики просмотров должны быть
+# общими для всех воркеров, поэтому prod.py подключает memcached.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Файлы отдаёт core.media.serve. Имена без хеша кешируются на сутки.
+MEDIA_CACHE_MAX_AGE = 24 * 60 * 60
+# 'X-Accel-Redirect' (nginx) или 'X-Sendfile' (Apache, lighttpd): тогда
+# приложение только проверяет запрос, а файл отдаёт веб-сервер.
+MEDIA_SENDFILE_HEADER = None
+# Внутренний location nginx, из которого отдаются файлы MEDIA_ROOT.
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+POST_IMAGE_MAX_BYTES = 5 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 6000 * 4000
+# Пережатие оригиналов: длинная сторона в пикселях и качество JPEG.
+POST_IMAGE_OPTIMIZE = True
+POST_IMAGE_MAX_SIDE = 1920
+POST_IMAGE_QUALITY = 82
+# Загрузка картинок по частям: где копить байты и сколько хранить, секунды.
+UPLOAD_SESSIONS_ROOT = os.path.join(BASE_DIR, 'upload_sessions')
+UPLOAD_SESSION_TTL = 24 * 60 * 60
+# Метаданные миниатюр sorl-thumbnail: LRU в процессе и SQLite на диске.
+THUMBNAIL_KVSTORE = 'core.thumbnails.KVStore'
+THUMBNAIL_KVSTORE_PATH = os.path.join(BASE_DIR, 'thumbnails.sqlite3')
+THUMBNAIL_LRU_SIZE = 4096
+# Тесты пишут записи о миниатюрах во временный файл, а не в рабочий.
+TEST_RUNNER = 'core.tests.runner.TestRunner'
+
+# Сжатие ответов в core.compression: уровни gzip и brotli и сколько
+# секунд хранить сжатые байты общих страниц.
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 5
+COMPRESSION_CACHE_TIMEOUT = 5 * 60
+
+CSRF_FAILURE_VIEW = 'core.views.handler403'
+STATIC_URL = '/static/'
+STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+STATIC_PURGE_CSS = ['css/bootstrap.min.css']
+# Классы, которые добавляют скрипты, а не шаблоны.
+STATIC_PURGE_SAFELIST = ['show', 'active', 'fade', 'collapsing']
+STATIC_CACHE_MAX_AGE = 60 * 60
+POSTS_PAGINATE = 10
+POSTS_LIMIT = 40
+# Сколько символов текста поста показывать в лентах.
+POST_EXCERPT_LENGTH = 300
+# Сколько секунд браузер может не перезапрашивать фрагмент ленты.
+FEED_FRAGMENT_MAX_AGE = 60
+# Сколько секунд хранить COUNT(*) лент; запись в Post сбрасывает его раньше.
+POSTS_COUNT_CACHE_TIMEOUT = 5 * 60
+# Рейтинг «Популярное»: период полураспада веса события и окно, секунды.
+TRENDING_HALF_LIFE = 6 * 60 * 60
+TRENDING_WINDOW = 3 * 24 * 60 * 60
+TRENDING_BATCH_SIZE = 500
+SUGGESTIONS_LIMIT = 5
+# Подписки пользователя в кеше; после follow/unfollow пересобираются сразу.
+FOLLOWING_CACHE_TIMEOUT = 60 * 60
+# Кеш авторов по username и, отдельно, несуществующих имён, секунды.
+AUTHOR_CACHE_TIMEOUT = 60 * 60
+AUTHOR_MISSING_TIMEOUT = 60
+# Просмотры поста копятся в кеше и пишутся в базу пачкой: при наборе
+# порога или общим сбросом всех постов раз в столько секунд.
+VIEW_COUNTER_FLUSH_THRESHOLD = 100
+VIEW_COUNTER_FLUSH_INTERVAL = 30
+# Открытая страница поста и ленты подписок спрашивает о новом раз
+# в столько секунд, пока вкладка на экране.
+UPDATES_POLL_INTERVAL = 30
+UPDATES_LIMIT = 100
+LOGIN_URL = 'users:login'
+LOGIN_REDIRECT_URL = '/create/'
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
@@ -0,0 +1,31 @@
+import os
+
+from .base import *  # noqa: F401,F403
+from .base import TEMPLATES
+
+DEBUG = False
+
+# Общий кеш всех воркеров: иначе выход из аккаунта и смена пароля не
+# доходят до процессов, где сессия и пользователь остались в памяти,
+# а просмотры и поколения лент расходятся между процессами.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': os.environ.get('MEMCACHED_LOCATION', '127.0.0.1:11211'),
+    }
+}
+
+# Шаблоны разбираются один раз на процесс и заранее, в CoreConfig.ready(),
+# а не при первом запросе.
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+TEMPLATES_PRECOMPILE = True
+
+# Собранная статика: хеши в именах, сжатые копии и очищенный Bootstrap.
+# Перед запуском нужен collectstatic.
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
@@ -0,0 +1,39 @@
+"""Прогрев процесса перед форком воркеров.
+
+Без прогрева каждый воркер на первом запросе импортирует представления,
+собирает URLconf и читает манифест статики — первый запрос в несколько
+раз медленнее следующих. wsgi.py вызывает warm_up() сразу после создания
+приложения: с gunicorn --preload это происходит в мастере, и воркеры
+получают всё готовым. Шаблоны здесь не разбираются: при
+TEMPLATES_PRECOMPILE это уже сделал CoreConfig.ready() внутри
+get_wsgi_application().
+
+В конце объекты переводятся в постоянное поколение через gc.freeze():
+сборщик мусора их больше не обходит и не трогает их заголовки, поэтому
+страницы памяти остаются общими между воркерами (copy-on-write).
+"""
+import gc
+import importlib
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.db import connections
+from django.urls import get_resolver
+
+VIEW_MODULES = ('posts.views', 'users.views', 'core.views', 'about.views')
+
+
+def warm_up():
+    for module in VIEW_MODULES:
+        importlib.import_module(module)
+    # reverse_dict собирает таблицы для reverse() и {% url %} по всем
+    # пространствам имён, url_patterns импортирует все urls.py.
+    resolver = get_resolver()
+    resolver.url_patterns
+    resolver.reverse_dict
+    # Хранилище статики создаётся лениво; с манифестом оно при создании
+    # читает staticfiles.json.
+    staticfiles_storage.base_url
+    # Соединения с базой не должны достаться воркерам по наследству.
+    connections.close_all()
+    gc.collect()
+    gc.freeze()
@@ -11,6 +11,11 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings.prod')
+
+# Модули прогрева обращаются к настройкам, поэтому импортируются только
+# после выбора модуля настроек.
+from yatube.warmup import warm_up  # noqa: E402
 
 application = get_wsgi_application()
+warm_up()